@@ -1,25 +1,265 @@
 import numpy as np
 import essentia
-import essentia.standard as es
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON export
+    orjson = None
+
+# Mood rules as (upper bound, moods) buckets, checked in order
+_TEMPO_BUCKETS = (
+    (70, ("slow", "relaxed")),
+    (100, ("moderate", "steady")),
+    (120, ("upbeat",)),
+    (float('inf'), ("energetic", "fast")),
+)
+_LOUDNESS_BUCKETS = (
+    (-20, ("soft", "intimate")),
+    (-10, ("balanced",)),
+    (float('inf'), ("loud", "intense")),
+)
+
+# Simplified key-based mood rules
+_KEY_MOODS = {
+    **dict.fromkeys(("C major", "G major", "D major", "A major", "E major", "B major", "F# major"),
+                    ("happy", "bright")),
+    **dict.fromkeys(("A minor", "E minor", "B minor", "F# minor", "C# minor", "G# minor", "D# minor"),
+                    ("melancholic", "somber")),
+}
+
+# Frequency ranges (Hz) behind the spectral_energy_band_ratio_N descriptors
+_ENERGY_BANDS = ((20, 150), (150, 800), (800, 4000), (4000, 20000))
+
+# Tempo and danceability only need the low end of the spectrum, so they run on
+# a copy of the signal resampled to this rate (about 5.5x fewer samples). The
+# BPM can differ from the full-rate estimate by a fraction of a beat per minute,
+# and onsets carried only by content above 4 kHz (hi-hats, cymbals) no longer
+# count towards it.
+_RHYTHM_SAMPLE_RATE = 8000
+
+# Onset envelope used to place the beat grid: frame and hop in samples of the
+# low-rate signal (8 ms resolution)
+_ONSET_FRAME = 256
+_ONSET_HOP = 64
+
+# Frames transformed per batched rfft (and host/device transfer) on the GPU path
+_GPU_BLOCK_FRAMES = 1024
+
+def _mood_numeric_features_py(mel_bands, mfcc_bands):
+    """Return (upper mel bands louder than the first 15, MFCC peak-to-peak range)
+    in a single pass over each array. Expects more than 15 mel bands and at least
+    one MFCC coefficient"""
+    n_mel = mel_bands.shape[0]
+    low_sum = 0.0
+    high_sum = 0.0
+    for i in range(n_mel):
+        if i < 15:
+            low_sum += mel_bands[i]
+        else:
+            high_sum += mel_bands[i]
+    
+    lo = mfcc_bands[0]
+    hi = mfcc_bands[0]
+    for i in range(1, mfcc_bands.shape[0]):
+        if mfcc_bands[i] < lo:
+            lo = mfcc_bands[i]
+        elif mfcc_bands[i] > hi:
+            hi = mfcc_bands[i]
+    
+    return high_sum / (n_mel - 15) > low_sum / 15, hi - lo
+
+_mood_numeric_kernel = None
+
+def _mood_numeric_features(mel_bands, mfcc_bands):
+    """_mood_numeric_features_py compiled with Numba on first use, so that
+    importing this module for description or export alone does not pay the
+    ~200 ms numba import"""
+    global _mood_numeric_kernel
+    if _mood_numeric_kernel is None:
+        from numba import njit
+        _mood_numeric_kernel = njit(cache=True, fastmath=True)(_mood_numeric_features_py)
+    return _mood_numeric_kernel(mel_bands, mfcc_bands)
+
+def _beat_ticks(low_rate_audio, tempo):
+    """Beat positions (seconds) for a constant tempo, phase-aligned to the audio.
+    
+    The tempo estimator reports no beat positions, so the beats are an evenly
+    spaced grid whose offset is the one that lines up best with the onsets: the
+    grid phase maximising the mean of a log-energy novelty curve at the beats.
+    """
+    if tempo <= 0 or len(low_rate_audio) < _ONSET_FRAME:
+        return np.array([], dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(
+        np.asarray(low_rate_audio, dtype=np.float32), _ONSET_FRAME)[::_ONSET_HOP]
+    log_energy = np.log10(np.einsum('ij,ij->i', frames, frames) + 1e-10)
+    novelty = np.maximum(np.diff(log_energy), 0)  # Rises in energy
+    if not novelty.size:
+        return np.array([], dtype=np.float32)
+    
+    # Score every phase of the beat grid (in novelty frames) in one go
+    period = 60.0 / tempo * _RHYTHM_SAMPLE_RATE / _ONSET_HOP
+    phases = np.arange(int(np.ceil(period)))
+    positions = np.rint(phases[:, None] + np.arange(int(len(novelty) / period) + 1) * period).astype(int)
+    inside = positions < len(novelty)
+    at_beats = novelty[np.minimum(positions, len(novelty) - 1)] * inside
+    scores = at_beats.sum(axis=1) / np.maximum(inside.sum(axis=1), 1)
+    
+    # Novelty frame i is the rise into frame i + 1: the first frame reaching an
+    # onset, which then lies in its last hop. The grid is extended back to the
+    # first beat of the signal
+    onset = (phases[np.argmax(scores)] + 1) * _ONSET_HOP + _ONSET_FRAME - _ONSET_HOP / 2
+    beat_period = 60.0 / tempo
+    start = (onset / _RHYTHM_SAMPLE_RATE) % beat_period
+    duration = len(low_rate_audio) / _RHYTHM_SAMPLE_RATE
+    return np.arange(start, duration, beat_period, dtype=np.float32)
+
+_essentia_standard = None
+
+def _es():
+    """Return essentia.standard, importing it on first use.
+    
+    Importing it registers every Essentia algorithm and takes the better part of
+    a second, which code that only formats or exports results never needs.
+    """
+    global _essentia_standard
+    if _essentia_standard is None:
+        import essentia.standard
+        _essentia_standard = essentia.standard
+    return _essentia_standard
+
+_cupy_module = None
+
+def _cupy():
+    """Return cupy if it is installed (optional GPU FFT path), else None"""
+    global _cupy_module
+    if _cupy_module is None:
+        try:
+            import cupy
+        except ImportError:
+            cupy = False
+        _cupy_module = cupy
+    return _cupy_module or None
+
+def _gpu_magnitude_spectra(cp, frames, window):
+    """Window a block of frames and return their magnitude spectra (float32,
+    one row per frame) from a single batched rfft on the GPU"""
+    block = cp.asarray(np.stack(frames)) * window
+    return cp.asnumpy(cp.abs(cp.fft.rfft(block, axis=1))).astype(np.float32)
+
+def _json_default(value):
+    """Serialise NumPy values that the JSON encoder does not handle natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+def _downcast(value):
+    """Store float arrays as float16; the descriptors are statistical summaries
+    that do not need more than ~3 significant digits. Arrays with values outside
+    the float16 range are left unchanged"""
+    if (isinstance(value, np.ndarray) and value.dtype.kind == 'f'
+            and value.dtype.itemsize > 2 and value.size
+            and np.abs(value).max() < _FLOAT16_MAX):
+        return value.astype(np.float16)
+    return value
+
+class BatchItem(NamedTuple):
+    """Outcome of one file in batch_analyze: results on success, error otherwise"""
+    file_path: str
+    results: Optional[dict] = None
+    error: Optional[str] = None
+
+class _PoolView:
+    """Read-only dict-style access to an Essentia Pool.
+    
+    descriptorNames() crosses into C++ and builds a fresh list on every call,
+    so the names are fetched once and kept as a set for O(1) membership tests.
+    """
+    
+    def __init__(self, pool):
+        self._pool = pool
+        self._names = frozenset(pool.descriptorNames())
+    
+    def __contains__(self, name):
+        return name in self._names
+    
+    def __getitem__(self, name):
+        return self._pool[name]
+    
+    def get(self, name, default=None):
+        return self._pool[name] if name in self._names else default
 
 class AudioAnalyzer:
-    def __init__(self):
+    def __init__(self, deep_features=False, use_gpu=False):
         self.sample_rate = 44100
         self.results = {}
-        
+        # When True, run Essentia's MusicExtractor for the full descriptor set
+        # (decodes and analyses the file a second time)
+        self.deep_features = deep_features
+        # When True and CuPy is installed, compute the frame spectra on the GPU
+        self.use_gpu = use_gpu
+        # Essentia algorithm instances keyed by (name, configuration) so that
+        # FFT plans and filterbanks are built once and reused across files
+        self._algo_cache = {}
+        
+    def _get_algo(self, name, **params):
+        """Return a cached Essentia algorithm instance for this configuration"""
+        key = (name, frozenset(
+            (k, tuple(v) if isinstance(v, list) else v) for k, v in params.items()
+        ))
+        algo = self._algo_cache.get(key)
+        if algo is None:
+            algo = getattr(_es(), name)(**params)
+            self._algo_cache[key] = algo
+        return algo
+        
+    def _frame_spectra(self, audio, frame_size, hop_size):
+        """Yield the magnitude spectrum of each Hann-windowed frame.
+        
+        With use_gpu and CuPy available, blocks of frames are transformed on the
+        GPU in one batched rfft; otherwise each frame goes through Essentia's
+        Windowing and Spectrum. Both give the same spectra.
+        """
+        frames = _es().FrameGenerator(audio, frameSize=frame_size, hopSize=hop_size)
+        cp = _cupy() if self.use_gpu else None
+        if cp is None:
+            windowing = self._get_algo('Windowing', type='hann')
+            spectrum = self._get_algo('Spectrum', size=frame_size)
+            for frame in frames:
+                yield spectrum(windowing(frame))
+            return
+        
+        # Essentia's normalised Hann window; its zero-phase rotation of the frame
+        # does not change the magnitude spectrum, so it is left out
+        window = cp.asarray(self._get_algo('Windowing', type='hann', zeroPhase=False)(
+            np.ones(frame_size, dtype=np.float32)))
+        block = []
+        for frame in frames:
+            block.append(frame)
+            if len(block) == _GPU_BLOCK_FRAMES:
+                yield from _gpu_magnitude_spectra(cp, block, window)
+                block = []
+        if block:
+            yield from _gpu_magnitude_spectra(cp, block, window)
+    
     def load_audio(self, file_path):
         """Load audio file using Essentia"""
         try:
             # Load audio file
-            audio = es.MonoLoader(filename=file_path, sampleRate=self.sample_rate)()
+            audio = _es().MonoLoader(filename=file_path, sampleRate=self.sample_rate)()
             return audio
         except Exception as e:
             print(f"Error loading audio: {e}")
             return None
             
-    def analyze_audio(self, file_path):
-        """Analyze audio using Essentia"""
+    def analyze_audio(self, file_path, file_name=None):
+        """Analyze audio using Essentia. file_name defaults to the basename of file_path"""
         results = {}
         
         # Load audio
@@ -27,103 +267,126 @@ class AudioAnalyzer:
         if audio is None:
             raise Exception("Failed to load audio file")
         
-        # Ensure audio array has even length for FFT
-        if len(audio) % 2 != 0:
-            audio = audio[:-1]  # Remove last sample to make it even
-            
         # Calculate Nyquist frequency based on sample rate
         nyquist_freq = self.sample_rate / 2
         high_freq_bound = min(22000, nyquist_freq - 50)  # Set high bound safely below Nyquist
+        
+        # Short-time analysis parameters; a fixed power-of-two frame keeps the
+        # cached Spectrum/MelBands/MFCC instances valid for every file
+        frame_size = 2048
+        hop_size = 1024
             
-        # Initialize algorithms
-        spectrum = es.Spectrum()
-        melBands = es.MelBands(inputSize=len(audio) // 2 + 1, 
+        # Get (cached) algorithms
+        melBands = self._get_algo('MelBands', inputSize=frame_size // 2 + 1, 
+                                  highFrequencyBound=high_freq_bound)  # Set high freq safely
+        mfcc = self._get_algo('MFCC', inputSize=frame_size // 2 + 1, 
                               highFrequencyBound=high_freq_bound)  # Set high freq safely
-        mfcc = es.MFCC(inputSize=len(audio) // 2 + 1, 
-                      highFrequencyBound=high_freq_bound)  # Set high freq safely
-        key = es.Key()
-        bpm = es.RhythmExtractor2013()
-        loudness = es.Loudness()
-        dissonance = es.Dissonance()
-        
-        # Initialize HPCP with the required algorithms
-        spectralPeaks = es.SpectralPeaks()
-        hpcp = es.HPCP()
+        key = self._get_algo('Key')
+        resample = self._get_algo('Resample', inputSampleRate=self.sample_rate,
+                                  outputSampleRate=_RHYTHM_SAMPLE_RATE, quality=1)
+        bpm = self._get_algo('PercivalBpmEstimator', sampleRate=_RHYTHM_SAMPLE_RATE,
+                             frameSize=256, hopSize=16,  # ~2 ms hop, as at full rate
+                             # ~6 s onset-strength window, as at full rate; a
+                             # shorter one doubles slow tempos (75 -> 150 BPM)
+                             frameSizeOSS=3072, hopSizeOSS=16)
+        loudness = self._get_algo('Loudness')
+        dissonance = self._get_algo('Dissonance')
+        
+        # HPCP with the required algorithms
+        spectralPeaks = self._get_algo('SpectralPeaks')
+        hpcp = self._get_algo('HPCP')
+        silent_hpcp = np.zeros(12, dtype=np.float32)  # HPCP of a frame without peaks
+        
+        # Low-level spectral descriptors used for instrument detection
+        centroid = self._get_algo('Centroid', range=nyquist_freq)
+        rolloff = self._get_algo('RollOff', sampleRate=self.sample_rate)
+        flatness = self._get_algo('Flatness')
+        contrast = self._get_algo('SpectralContrast', frameSize=frame_size,
+                                  sampleRate=self.sample_rate)
+        band_ratios = [self._get_algo('EnergyBandRatio', sampleRate=self.sample_rate,
+                                      startFrequency=low, stopFrequency=high)
+                       for low, high in _ENERGY_BANDS]
         
         # Extract features with error handling
+        pool = essentia.Pool()
+        stats = essentia.Pool()
+        low_rate_audio = None
         try:
-            spec = spectrum(audio)
-            mel_bands = melBands(spec)
-            mfcc_bands = mfcc(spec)[1]
-            
-            # Calculate HPCP by first getting the spectral peaks
-            freqs, mags = spectralPeaks(spec)
-            hpcp_output = hpcp(freqs, mags)
+            # Frame-by-frame spectral analysis, accumulated in a Pool
+            for spec in self._frame_spectra(audio, frame_size, hop_size):
+                mfcc_mel, mfcc_coeffs = mfcc(spec)
+                pool.add('mel_bands', melBands(spec))
+                pool.add('mfcc', mfcc_coeffs)
+                
+                # HPCP and dissonance both work on the spectral peaks; silent
+                # frames have none, and dissonance needs at least two
+                freqs, mags = spectralPeaks(spec)
+                pool.add('hpcp', hpcp(freqs, mags) if freqs.size else silent_hpcp)
+                pool.add('dissonance', dissonance(freqs, mags) if freqs.size >= 2 else 0.0)
+                
+                # Low-level descriptors (summarised into features_dict below)
+                pool.add('lowlevel.mfcc_bands', float(np.mean(mfcc_mel)))
+                pool.add('lowlevel.spectral_centroid', centroid(np.square(spec)))  # Power-weighted
+                pool.add('lowlevel.spectral_rolloff', rolloff(spec))
+                pool.add('lowlevel.spectral_flatness_db',
+                         10 * np.log10(max(flatness(spec), 1e-6)))
+                pool.add('lowlevel.spectral_contrast_coeffs_0', contrast(spec)[0][0])
+                for i, band_ratio in enumerate(band_ratios):
+                    pool.add(f'lowlevel.spectral_energy_band_ratio_{i}', band_ratio(spec))
             
-            # Dissonance also needs spectral peaks
-            diss = dissonance(freqs, mags)  # Pass both frequencies and magnitudes
+            # Summarise every descriptor over the frames in one pass
+            stats = self._get_algo('PoolAggregator', defaultStats=['mean', 'stdev'])(pool)
+            mel_bands = stats['mel_bands.mean']
+            mfcc_bands = stats['mfcc.mean']
+            hpcp_output = stats['hpcp.mean']
+            diss = float(stats['dissonance.mean'])
             
-            # Get key with error handling
-            try:
-                key_data = key(hpcp_output)
-            except Exception as e:
-                print(f"Warning: Key detection error: {e}")
-                # Use default key if detection fails
+            # Get key with error handling; a silent file has an all-zero profile
+            if hpcp_output.any():
+                try:
+                    key_data = key(hpcp_output)
+                except Exception as e:
+                    print(f"Warning: Key detection error: {e}")
+                    # Use default key if detection fails
+                    key_data = ("C major", "major")  # Default to C major
+            else:
                 key_data = ("C major", "major")  # Default to C major
                 
-            rhythm_data = bpm(audio)
+            # Low-rate view of the signal, shared with the rhythm descriptors
+            low_rate_audio = resample(audio)
+            # The cached estimator keeps the previous file's state; without a
+            # reset every later file reports the first file's tempo
+            bpm.reset()
+            tempo = float(bpm(low_rate_audio))
+            # The estimator only reports the tempo; BeatsLoudness gets a beat
+            # grid aligned to the onsets (see _beat_ticks)
+            rhythm_data = (tempo, _beat_ticks(low_rate_audio, tempo))
             loud = loudness(audio)
         except Exception as e:
             print(f"Warning: Feature extraction error: {e}")
             # Use default values if extraction fails
-            spec = np.zeros(1025)  # Default empty spectrum
-            mel_bands = np.zeros(40)  # Default mel bands
+            mel_bands = np.zeros(24)  # Default mel bands (MelBands' 24 bands)
             mfcc_bands = np.zeros(13)  # Default MFCC bands
             key_data = ("C major", "major")  # Default to C major
-            rhythm_data = (120, np.array([0]), np.array([0]), np.array([0]))  # Default 120 BPM
+            rhythm_data = (120, np.array([]))  # Default 120 BPM
             loud = -20  # Default loudness
             diss = 0.5  # Default dissonance
         
-        # Instrument detection using MusicExtractor
+        # Descriptors for instrument detection and the description
         try:
-            music_extractor = es.MusicExtractor(lowlevelStats=['mean', 'stdev'],
-                                              rhythmStats=['mean', 'stdev'],
-                                              tonalStats=['mean', 'stdev'])
-            features = music_extractor(file_path)
-            
-            # Debug: Print the features structure
-            print(f"MusicExtractor features type: {type(features)}")
-            if isinstance(features, tuple):
-                print(f"Features tuple length: {len(features)}")
-                if features and len(features) > 0:
-                    print(f"First element type: {type(features[0])}")
-            
-            # Process Pool object from MusicExtractor
-            if isinstance(features, tuple) and features:
-                first_element = features[0]
-                # Check if it's a Pool object (has descriptorNames method)
-                if hasattr(first_element, 'descriptorNames') and callable(getattr(first_element, 'descriptorNames', None)):
-                    print("First element is a Pool, converting to dictionary")
-                    # Convert Pool to dictionary
-                    features_dict = {}
-                    for name in first_element.descriptorNames():
-                        try:
-                            features_dict[name] = first_element[name]
-                        except Exception as e:
-                            print(f"Error accessing Pool descriptor {name}: {e}")
-                elif isinstance(first_element, dict):
-                    features_dict = first_element
-                else:
-                    print(f"Unknown first element type: {type(first_element)}, using default features")
-                    features_dict = self._create_default_features()
+            if self.deep_features:
+                features_dict = self._extract_deep_features(file_path)
             else:
-                features_dict = features
-                
+                features_dict = self._extract_curated_features(audio, pool, stats, rhythm_data[1], hop_size,
+                                                              low_rate_audio)
         except Exception as e:
-            print(f"Warning: MusicExtractor error: {e}")
+            print(f"Warning: Feature dictionary error: {e}")
             # Create a minimal features dict with defaults
             features_dict = self._create_default_features()
         
+        if isinstance(features_dict, dict):
+            features_dict = {name: _downcast(value) for name, value in features_dict.items()}
+        
         # Mood detection based on features
         # Using simple rules based on key, tempo and spectral features
         mood = self._detect_mood(key_data[0], rhythm_data[0], loud, mfcc_bands, mel_bands)
@@ -140,7 +403,7 @@ class AudioAnalyzer:
         results["instruments"] = instruments  # Detected instruments
         results["advanced_features"] = features_dict  # All extracted features
         results["audio"] = audio  # Store audio for visualization
-        results["file_name"] = os.path.basename(file_path)  # Store filename for reference
+        results["file_name"] = file_name or os.path.basename(file_path)  # Store filename for reference
         
         # Debug: Print structure of the features_dict
         print(f"Feature dictionary structure: {type(features_dict)}")
@@ -150,6 +413,83 @@ class AudioAnalyzer:
         self.results = results
         return results
     
+    def _extract_curated_features(self, audio, pool, stats, ticks, hop_size, low_rate_audio=None):
+        """Build the descriptors used by instrument detection and the description
+        from the framewise pool, its aggregated stats and the loaded audio, without
+        decoding the file again. low_rate_audio is the signal resampled to
+        _RHYTHM_SAMPLE_RATE, if available"""
+        features = {}
+        
+        # Framewise low-level descriptors: mean and stdev over all frames
+        for name in stats.descriptorNames():
+            if name.startswith('lowlevel.'):
+                features[name] = float(stats[name])
+        
+        # Whole-signal descriptors
+        dynamic_complexity = self._get_algo('DynamicComplexity', sampleRate=self.sample_rate)
+        features['lowlevel.dynamic_complexity'] = float(dynamic_complexity(audio)[0])
+        
+        # Danceability only depends on the rhythm, so the low-rate copy is enough
+        if low_rate_audio is not None:
+            danceability = self._get_algo('Danceability', sampleRate=_RHYTHM_SAMPLE_RATE)
+            features['rhythm.danceability'] = float(danceability(low_rate_audio)[0])
+        else:
+            danceability = self._get_algo('Danceability', sampleRate=self.sample_rate)
+            features['rhythm.danceability'] = float(danceability(audio)[0])
+        
+        chords_detection = self._get_algo('ChordsDetection', hopSize=hop_size,
+                                          sampleRate=self.sample_rate)
+        chords = chords_detection(pool['hpcp'])[0]
+        features['tonal.chords_number'] = len(set(chords))
+        
+        # BeatsLoudness is configured with the beat positions, so it is not cached
+        if len(ticks) > 0:
+            beats_loudness = _es().BeatsLoudness(sampleRate=self.sample_rate, beats=ticks)(audio)[0]
+            features['rhythm.beats_loudness.mean'] = float(np.mean(beats_loudness))
+            features['rhythm.beats_loudness.stdev'] = float(np.std(beats_loudness))
+        else:
+            features['rhythm.beats_loudness.mean'] = 0.0
+            features['rhythm.beats_loudness.stdev'] = 0.0
+        
+        return features
+    
+    def _extract_deep_features(self, file_path):
+        """Run Essentia's MusicExtractor on the file for the full descriptor set"""
+        music_extractor = self._get_algo('MusicExtractor',
+                                         lowlevelStats=['mean', 'stdev'],
+                                         rhythmStats=['mean', 'stdev'],
+                                         tonalStats=['mean', 'stdev'])
+        features = music_extractor(file_path)
+        
+        # Debug: Print the features structure
+        print(f"MusicExtractor features type: {type(features)}")
+        if isinstance(features, tuple):
+            print(f"Features tuple length: {len(features)}")
+            if features and len(features) > 0:
+                print(f"First element type: {type(features[0])}")
+        
+        # Process Pool object from MusicExtractor
+        if isinstance(features, tuple) and features:
+            first_element = features[0]
+            # Check if it's a Pool object (has descriptorNames method)
+            if hasattr(first_element, 'descriptorNames') and callable(getattr(first_element, 'descriptorNames', None)):
+                print("First element is a Pool, converting to dictionary")
+                # Convert Pool to dictionary, leaving out the file/extractor
+                # metadata (codec, tags, versions), which is not an audio descriptor
+                features_dict = {
+                    name: first_element[name] for name in first_element.descriptorNames()
+                    if not name.startswith('metadata.')
+                }
+            elif isinstance(first_element, dict):
+                features_dict = first_element
+            else:
+                print(f"Unknown first element type: {type(first_element)}, using default features")
+                features_dict = self._create_default_features()
+        else:
+            features_dict = features
+        
+        return features_dict
+    
     def _create_default_features(self):
         """Create default features dict in case MusicExtractor fails"""
         features = {
@@ -171,217 +511,111 @@ class AudioAnalyzer:
     
     def _detect_mood(self, key, bpm, loudness, mfcc_bands, mel_bands):
         """Detect mood of the audio based on extracted features"""
-        moods = []
-        
-        # Tempo based mood detection
-        if bpm < 70:
-            moods.append("slow")
-            moods.append("relaxed")
-        elif bpm < 100:
-            moods.append("moderate")
-            moods.append("steady")
-        elif bpm < 120:
-            moods.append("upbeat")
-        else:
-            moods.append("energetic")
-            moods.append("fast")
-        
-        # Loudness based mood
-        if loudness < -20:
-            moods.append("soft")
-            moods.append("intimate")
-        elif loudness < -10:
-            moods.append("balanced")
-        else:
-            moods.append("loud")
-            moods.append("intense")
+        moods = set()
+        
+        # Tempo and loudness based mood: first bucket whose bound is above the value
+        for value, buckets in ((bpm, _TEMPO_BUCKETS), (loudness, _LOUDNESS_BUCKETS)):
+            for bound, tags in buckets:
+                if value < bound:
+                    moods.update(tags)
+                    break
+            else:
+                moods.update(buckets[-1][1])  # e.g. NaN, as the old else branches did
         
         # Key based mood (simplified)
-        major_keys = ["C major", "G major", "D major", "A major", "E major", "B major", "F# major"]
-        minor_keys = ["A minor", "E minor", "B minor", "F# minor", "C# minor", "G# minor", "D# minor"]
+        moods.update(_KEY_MOODS.get(key, ()))
         
-        if key in major_keys:
-            moods.append("happy")
-            moods.append("bright")
-        elif key in minor_keys:
-            moods.append("melancholic")
-            moods.append("somber")
+        if mel_bands is None or mfcc_bands is None or len(mel_bands) <= 15 or len(mfcc_bands) == 0:
+            # Default values if the spectral summaries are unusable
+            moods.update(("balanced", "textured"))
+            return list(moods)
+        high_energy, mfcc_range = _mood_numeric_features(mel_bands, mfcc_bands)
         
         # Spectral features for additional mood detection
         # High energy in higher mel bands often indicates brightness
-        try:
-            high_energy = np.mean(mel_bands[15:]) > np.mean(mel_bands[:15])
-            if high_energy:
-                moods.append("bright")
-                moods.append("sharp")
-            else:
-                moods.append("warm")
-                moods.append("deep")
-        except:
-            # Default values if calculation fails
-            moods.append("balanced")
+        if high_energy:
+            moods.update(("bright", "sharp"))
+        else:
+            moods.update(("warm", "deep"))
         
-        # Use MFCC for texture
-        try:
-            mfcc_std = np.std(mfcc_bands)
-            if mfcc_std > 15:
-                moods.append("complex")
-                moods.append("textured")
-            else:
-                moods.append("simple")
-                moods.append("clean")
-        except:
-            # Default values if calculation fails
-            moods.append("textured")
-        
-        # Remove duplicates and return
-        return list(set(moods))
+        # Use MFCC for texture; the range of the 13 coefficients is about four
+        # times their standard deviation, so this matches the old std > 15 test
+        if mfcc_range > 60:
+            moods.update(("complex", "textured"))
+        else:
+            moods.update(("simple", "clean"))
+        
+        return list(moods)
     
     def _detect_instruments(self, features):
         """Detect instruments in the audio based on extracted features"""
         instruments = []
         
-        try:
-            # Check if features is a Pool object
-            if hasattr(features, 'descriptorNames') and callable(getattr(features, 'descriptorNames', None)):
-                # Check for percussion
-                if 'rhythm.beats_loudness.mean' in features.descriptorNames() and features['rhythm.beats_loudness.mean'] > 0.5:
-                    instruments.append("drums")
-                
-                # Check for bass
-                if 'lowlevel.spectral_energy_band_ratio_0.mean' in features.descriptorNames() and features['lowlevel.spectral_energy_band_ratio_0.mean'] > 0.4:
-                    instruments.append("bass")
-                
-                # Check for guitar or strings
-                if 'lowlevel.spectral_energy_band_ratio_2.mean' in features.descriptorNames() and features['lowlevel.spectral_energy_band_ratio_2.mean'] > 0.3:
-                    if 'lowlevel.spectral_centroid.mean' in features.descriptorNames() and features['lowlevel.spectral_centroid.mean'] < 1500:
-                        instruments.append("guitar")
-                    else:
-                        instruments.append("strings")
-                
-                # Check for piano
-                if ('lowlevel.spectral_energy_band_ratio_1.mean' in features.descriptorNames() and 
-                    'lowlevel.spectral_contrast_coeffs_0.mean' in features.descriptorNames() and
-                    features['lowlevel.spectral_energy_band_ratio_1.mean'] > 0.25 and 
-                    features['lowlevel.spectral_contrast_coeffs_0.mean'] > 0.2):
-                    instruments.append("piano")
-                
-                # Check for vocals
-                if 'lowlevel.mfcc_bands.mean' in features.descriptorNames() and features['lowlevel.mfcc_bands.mean'] > 0.5:
-                    instruments.append("vocals")
-                
-                # Check for brass
-                if ('lowlevel.spectral_energy_band_ratio_3.mean' in features.descriptorNames() and
-                    'lowlevel.spectral_rolloff.mean' in features.descriptorNames() and
-                    features['lowlevel.spectral_energy_band_ratio_3.mean'] > 0.2 and 
-                    features['lowlevel.spectral_rolloff.mean'] > 3000):
-                    instruments.append("brass")
-                
-                # Check for synthesizers
-                if 'lowlevel.spectral_flatness_db.mean' in features.descriptorNames() and features['lowlevel.spectral_flatness_db.mean'] > -30:
-                    instruments.append("synthesizer")
-                    
-            # Check if features is a tuple (some versions of Essentia return tuples)
-            elif isinstance(features, tuple):
-                # It's likely that the first element is the actual features dict
-                if features and isinstance(features[0], dict):
-                    features = features[0]
-                    
-                    # Now process as dictionary
-                    if features.get('rhythm.beats_loudness.mean', 0) > 0.5:
-                        instruments.append("drums")
-                    
-                    if features.get('lowlevel.spectral_energy_band_ratio_0.mean', 0) > 0.4:
-                        instruments.append("bass")
-                    
-                    if features.get('lowlevel.spectral_energy_band_ratio_2.mean', 0) > 0.3:
-                        if features.get('lowlevel.spectral_centroid.mean', 0) < 1500:
-                            instruments.append("guitar")
-                        else:
-                            instruments.append("strings")
-                    
-                    if (features.get('lowlevel.spectral_energy_band_ratio_1.mean', 0) > 0.25 and 
-                        features.get('lowlevel.spectral_contrast_coeffs_0.mean', 0) > 0.2):
-                        instruments.append("piano")
-                    
-                    if features.get('lowlevel.mfcc_bands.mean', 0) > 0.5:
-                        instruments.append("vocals")
-                    
-                    if (features.get('lowlevel.spectral_energy_band_ratio_3.mean', 0) > 0.2 and 
-                        features.get('lowlevel.spectral_rolloff.mean', 0) > 3000):
-                        instruments.append("brass")
-                    
-                    if features.get('lowlevel.spectral_flatness_db.mean', -50) > -30:
-                        instruments.append("synthesizer")
-                else:
-                    # Fallback to default features if structure is unexpected
-                    return ["mixed instruments"]
-            # If features is a dictionary        
-            elif isinstance(features, dict):
-                # Check for percussion
-                if features.get('rhythm.beats_loudness.mean', 0) > 0.5:
-                    instruments.append("drums")
-                
-                # Check for bass
-                if features.get('lowlevel.spectral_energy_band_ratio_0.mean', 0) > 0.4:
-                    instruments.append("bass")
-                
-                # Check for guitar or strings
-                if features.get('lowlevel.spectral_energy_band_ratio_2.mean', 0) > 0.3:
-                    if features.get('lowlevel.spectral_centroid.mean', 0) < 1500:
-                        instruments.append("guitar")
-                    else:
-                        instruments.append("strings")
-                
-                # Check for piano
-                if (features.get('lowlevel.spectral_energy_band_ratio_1.mean', 0) > 0.25 and 
-                    features.get('lowlevel.spectral_contrast_coeffs_0.mean', 0) > 0.2):
-                    instruments.append("piano")
-                
-                # Check for vocals
-                if features.get('lowlevel.mfcc_bands.mean', 0) > 0.5:
-                    instruments.append("vocals")
-                
-                # Check for brass
-                if (features.get('lowlevel.spectral_energy_band_ratio_3.mean', 0) > 0.2 and 
-                    features.get('lowlevel.spectral_rolloff.mean', 0) > 3000):
-                    instruments.append("brass")
-                
-                # Check for synthesizers
-                if features.get('lowlevel.spectral_flatness_db.mean', -50) > -30:
-                    instruments.append("synthesizer")
-        except Exception as e:
-            print(f"Warning: Instrument detection error: {e}")
+        f = self._unwrap_features(features)
+        if f is None:
+            # Fallback to default features if structure is unexpected
+            return ["mixed instruments"]
+        
+        # Check for percussion
+        if f.get('rhythm.beats_loudness.mean', 0) > 0.5:
+            instruments.append("drums")
+            
+        # Check for bass
+        if f.get('lowlevel.spectral_energy_band_ratio_0.mean', 0) > 0.4:
+            instruments.append("bass")
+            
+        # Check for guitar or strings
+        if f.get('lowlevel.spectral_energy_band_ratio_2.mean', 0) > 0.3:
+            if f.get('lowlevel.spectral_centroid.mean', 0) < 1500:
+                instruments.append("guitar")
+            else:
+                instruments.append("strings")
+            
+        # Check for piano
+        if (f.get('lowlevel.spectral_energy_band_ratio_1.mean', 0) > 0.25 and 
+            f.get('lowlevel.spectral_contrast_coeffs_0.mean', 0) > 0.2):
+            instruments.append("piano")
+            
+        # Check for vocals
+        if f.get('lowlevel.mfcc_bands.mean', 0) > 0.5:
+            instruments.append("vocals")
+            
+        # Check for brass
+        if (f.get('lowlevel.spectral_energy_band_ratio_3.mean', 0) > 0.2 and 
+            f.get('lowlevel.spectral_rolloff.mean', 0) > 3000):
+            instruments.append("brass")
+            
+        # Check for synthesizers
+        if f.get('lowlevel.spectral_flatness_db.mean', -50) > -30:
+            instruments.append("synthesizer")
         
         # If no instruments detected, add some fallbacks based on general features
         if not instruments:
-            try:
-                # For Pool object
-                if hasattr(features, 'descriptorNames') and callable(getattr(features, 'descriptorNames', None)):
-                    if 'lowlevel.spectral_centroid.mean' in features.descriptorNames():
-                        if features['lowlevel.spectral_centroid.mean'] < 1000:
-                            instruments.append("bass-heavy instruments")
-                        elif features['lowlevel.spectral_centroid.mean'] < 2000:
-                            instruments.append("mid-range instruments")
-                        else:
-                            instruments.append("high-range instruments")
-                # For dictionary
-                elif isinstance(features, dict):
-                    if features.get('lowlevel.spectral_centroid.mean', 0) < 1000:
-                        instruments.append("bass-heavy instruments")
-                    elif features.get('lowlevel.spectral_centroid.mean', 0) < 2000:
-                        instruments.append("mid-range instruments")
-                    else:
-                        instruments.append("high-range instruments")
-            except:
-                # Most generic fallback
-                instruments.append("mixed instruments")
+            centroid = f.get('lowlevel.spectral_centroid.mean')
+            if centroid is not None:
+                if centroid < 1000:
+                    instruments.append("bass-heavy instruments")
+                elif centroid < 2000:
+                    instruments.append("mid-range instruments")
+                else:
+                    instruments.append("high-range instruments")
         
         if not instruments:
             instruments.append("mixed instruments")
         
         return instruments
     
+    def _unwrap_features(self, features):
+        """Return a dict-like view of the descriptors, or None if unrecognised"""
+        # Some versions of Essentia return (Pool, ...) tuples
+        if isinstance(features, tuple):
+            features = features[0] if features else None
+        if hasattr(features, 'descriptorNames') and callable(getattr(features, 'descriptorNames', None)):
+            return _PoolView(features)
+        if isinstance(features, dict):
+            return features
+        return None
+    
     def generate_description(self):
         """Generate a detailed description of the audio for LLM input"""
         if not self.results:
@@ -390,143 +624,67 @@ class AudioAnalyzer:
         r = self.results
         
         # Create a descriptive text about the audio
-        description = f"This audio track is in {r['key']} with a tempo of {r['bpm']} BPM. "
-        description += f"The overall loudness is {r['loudness']} dB, which makes it a "
+        parts = [f"This audio track is in {r['key']} with a tempo of {r['bpm']} BPM. ",
+                 f"The overall loudness is {r['loudness']} dB, which makes it a "]
         
         # Add mood description
         if r['mood']:
-            description += f"{', '.join(r['mood'][:3])} piece. "
+            parts.append(f"{', '.join(r['mood'][:3])} piece. ")
         
         # Add instruments
         if r['instruments']:
-            description += f"The main instruments detected are {', '.join(r['instruments'])}. "
+            parts.append(f"The main instruments detected are {', '.join(r['instruments'])}. ")
         
         # Add additional characteristics
         if 'advanced_features' in r:
-            try:
-                f = r['advanced_features']
-                
-                # More robust structure checking for features
-                valid_features = False
+            f = self._unwrap_features(r['advanced_features'])
                 
-                # Check if f is a Pool object
-                if hasattr(f, 'descriptorNames') and callable(getattr(f, 'descriptorNames', None)):
-                    valid_features = True
-                    # Dynamics
-                    if 'lowlevel.dynamic_complexity' in f.descriptorNames() and f['lowlevel.dynamic_complexity'] > 0.5:
-                        description += "It has varied dynamics with significant changes in intensity. "
-                    else:
-                        description += "It maintains a relatively consistent dynamic level throughout. "
-                    
-                    # Rhythm
-                    if 'rhythm.danceability' in f.descriptorNames() and f['rhythm.danceability'] > 0.6:
-                        description += "The rhythm is highly danceable and groovy. "
-                    else:
-                        description += "The rhythm is more complex and less dance-oriented. "
-                        
-                    # Harmony
-                    if 'tonal.chords_number' in f.descriptorNames() and f['tonal.chords_number'] > 4:
-                        description += "It has a rich harmonic progression with multiple chord changes. "
-                    else:
-                        description += "It has a simpler harmonic structure with fewer chord changes. "
-                
-                # If features is a tuple, try to extract the dictionary
-                elif isinstance(f, tuple):
-                    if f and hasattr(f[0], 'descriptorNames') and callable(getattr(f[0], 'descriptorNames', None)):
-                        valid_features = True
-                        pool = f[0]
-                        # Dynamics
-                        if 'lowlevel.dynamic_complexity' in pool.descriptorNames() and pool['lowlevel.dynamic_complexity'] > 0.5:
-                            description += "It has varied dynamics with significant changes in intensity. "
-                        else:
-                            description += "It maintains a relatively consistent dynamic level throughout. "
-                        
-                        # Rhythm
-                        if 'rhythm.danceability' in pool.descriptorNames() and pool['rhythm.danceability'] > 0.6:
-                            description += "The rhythm is highly danceable and groovy. "
-                        else:
-                            description += "The rhythm is more complex and less dance-oriented. "
-                            
-                        # Harmony
-                        if 'tonal.chords_number' in pool.descriptorNames() and pool['tonal.chords_number'] > 4:
-                            description += "It has a rich harmonic progression with multiple chord changes. "
-                        else:
-                            description += "It has a simpler harmonic structure with fewer chord changes. "
-                    elif f and isinstance(f[0], dict):
-                        valid_features = True
-                        dict_f = f[0]
-                        # Dynamics
-                        if dict_f.get('lowlevel.dynamic_complexity', 0) > 0.5:
-                            description += "It has varied dynamics with significant changes in intensity. "
-                        else:
-                            description += "It maintains a relatively consistent dynamic level throughout. "
-                        
-                        # Rhythm
-                        if dict_f.get('rhythm.danceability', 0) > 0.6:
-                            description += "The rhythm is highly danceable and groovy. "
-                        else:
-                            description += "The rhythm is more complex and less dance-oriented. "
-                            
-                        # Harmony
-                        if dict_f.get('tonal.chords_number', 0) > 4:
-                            description += "It has a rich harmonic progression with multiple chord changes. "
-                        else:
-                            description += "It has a simpler harmonic structure with fewer chord changes. "
-                # If features is already a dictionary
-                elif isinstance(f, dict):
-                    valid_features = True
-                    # Dynamics
-                    if f.get('lowlevel.dynamic_complexity', 0) > 0.5:
-                        description += "It has varied dynamics with significant changes in intensity. "
-                    else:
-                        description += "It maintains a relatively consistent dynamic level throughout. "
+            if f is not None:
+                # Dynamics
+                if f.get('lowlevel.dynamic_complexity', 0) > 0.5:
+                    parts.append("It has varied dynamics with significant changes in intensity. ")
+                else:
+                    parts.append("It maintains a relatively consistent dynamic level throughout. ")
                     
-                    # Rhythm
-                    if f.get('rhythm.danceability', 0) > 0.6:
-                        description += "The rhythm is highly danceable and groovy. "
-                    else:
-                        description += "The rhythm is more complex and less dance-oriented. "
+                # Rhythm
+                if f.get('rhythm.danceability', 0) > 0.6:
+                    parts.append("The rhythm is highly danceable and groovy. ")
+                else:
+                    parts.append("The rhythm is more complex and less dance-oriented. ")
                         
-                    # Harmony
-                    if f.get('tonal.chords_number', 0) > 4:
-                        description += "It has a rich harmonic progression with multiple chord changes. "
-                    else:
-                        description += "It has a simpler harmonic structure with fewer chord changes. "
-                
-                # If no valid features structure found
-                if not valid_features:
-                    # Use generic description if structure is unexpected
-                    description += "It has a distinctive sonic character. "
-            except Exception as e:
-                print(f"Warning: Error generating additional characteristics: {e}")
-                # Add generic description if we can't get specific features
-                description += "It has a distinctive sonic character. "
+                # Harmony
+                if f.get('tonal.chords_number', 0) > 4:
+                    parts.append("It has a rich harmonic progression with multiple chord changes. ")
+                else:
+                    parts.append("It has a simpler harmonic structure with fewer chord changes. ")
+            else:
+                # Use generic description if structure is unexpected
+                parts.append("It has a distinctive sonic character. ")
         
         # Summary for lyrics suggestions
-        description += "\n\nLyrics for this track should reflect its "
+        parts.append("\n\nLyrics for this track should reflect its ")
         if r['mood']:
-            description += f"{', '.join(r['mood'][:2])} atmosphere"
+            parts.append(f"{', '.join(r['mood'][:2])} atmosphere")
         else:
-            description += "distinctive atmosphere"
+            parts.append("distinctive atmosphere")
             
-        description += " and could explore themes that complement its "
+        parts.append(" and could explore themes that complement its ")
         
         # Suggest themes based on mood
-        themes = []
         moods = r.get('mood', [])
         
         if any(m in moods for m in ["happy", "bright", "energetic"]):
-            themes.extend(["celebration", "optimism", "adventure"])
+            themes = ["celebration", "optimism", "adventure"]
         elif any(m in moods for m in ["melancholic", "somber", "soft"]):
-            themes.extend(["reflection", "longing", "memory"])
+            themes = ["reflection", "longing", "memory"]
         elif any(m in moods for m in ["intense", "complex", "fast"]):
-            themes.extend(["struggle", "determination", "passion"])
+            themes = ["struggle", "determination", "passion"]
         else:
-            themes.extend(["journey", "transformation", "connection"])
+            themes = ["journey", "transformation", "connection"]
             
-        description += f"{', '.join(themes)} themes."
+        parts.append(f"{', '.join(themes)} themes.")
         
-        return description
+        return "".join(parts)
 
     def export_results_to_json(self, file_path):
         """Export analysis results to a JSON file"""
@@ -535,38 +693,28 @@ class AudioAnalyzer:
             return False
             
         try:
-            import json
-            # Create a copy of results without the audio data (which can't be serialized)
-            export_data = self.results.copy()
-            if 'audio' in export_data:
-                del export_data['audio']
-                
-            # Convert numpy arrays to lists for JSON serialization
-            for key, value in export_data.items():
-                if isinstance(value, np.ndarray):
-                    export_data[key] = value.tolist()
+            # Shallow view of the results without the audio data (which isn't
+            # exported); NumPy values are serialised as they are, not copied to lists
+            export_data = {key: value for key, value in self.results.items() if key != 'audio'}
                     
             # Handle advanced features
             if 'advanced_features' in export_data:
                 advanced_features = export_data['advanced_features']
                 # If it's a Pool object, convert to dict
                 if hasattr(advanced_features, 'descriptorNames'):
-                    feature_dict = {}
-                    for name in advanced_features.descriptorNames():
-                        try:
-                            # Convert numpy arrays to lists
-                            value = advanced_features[name]
-                            if isinstance(value, np.ndarray):
-                                feature_dict[name] = value.tolist()
-                            else:
-                                feature_dict[name] = value
-                        except:
-                            pass
-                    export_data['advanced_features'] = feature_dict
+                    export_data['advanced_features'] = {
+                        name: advanced_features[name] for name in advanced_features.descriptorNames()
+                    }
             
             # Write to JSON file
-            with open(file_path, 'w') as f:
-                json.dump(export_data, f, indent=2)
+            if orjson is not None:
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(export_data, default=_json_default,
+                                         option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2))
+            else:
+                import json
+                with open(file_path, 'w') as f:
+                    json.dump(export_data, f, indent=2, default=_json_default)
                 
             print(f"Results exported to {file_path}")
             return True
@@ -575,32 +723,66 @@ class AudioAnalyzer:
             print(f"Error exporting results: {e}")
             return False
             
-    def batch_analyze(self, file_list, callback=None):
-        """Analyze multiple audio files in batch mode"""
-        results = []
-        
-        for i, file_path in enumerate(file_list):
-            try:
-                print(f"Analyzing file {i+1}/{len(file_list)}: {os.path.basename(file_path)}")
-                file_results = self.analyze_audio(file_path)
-                results.append({
-                    'file_path': file_path,
-                    'results': file_results
-                })
-                
-                # Call the callback if provided
-                if callback:
-                    callback(i+1, len(file_list), file_path, file_results)
+    def batch_analyze(self, file_list, callback=None, max_workers=None, keep_audio=False):
+        """Analyze multiple audio files in parallel worker processes.
+        
+        The decoded signal ('audio') is dropped from each file's results in the
+        worker unless keep_audio is set, so it is not pickled back to this process
+        """
+        if not file_list:
+            return []
+        
+        results = [None] * len(file_list)
+        total = len(file_list)
+        file_names = [os.path.basename(file_path) for file_path in file_list]
+        completed = 0
+        
+        # Each worker builds its own AudioAnalyzer once, so its algorithm cache
+        # is reused for every file that worker handles; no more workers than files
+        n_workers = min(max_workers or os.cpu_count() or 1, total)
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.deep_features, self.use_gpu)) as executor:
+            futures = {executor.submit(_analyze_in_worker, file_path, file_names[i], keep_audio): i
+                       for i, file_path in enumerate(file_list)}
+            
+            for future in as_completed(futures):
+                i = futures[future]
+                file_path = file_list[i]
+                completed += 1
+                try:
+                    file_results = future.result()
+                    print(f"Analyzed file {completed}/{total}: {file_names[i]}")
+                    results[i] = BatchItem(file_path, results=file_results)
                     
-            except Exception as e:
-                print(f"Error analyzing {file_path}: {e}")
-                results.append({
-                    'file_path': file_path,
-                    'error': str(e)
-                })
-                
-                # Call the callback with error
-                if callback:
-                    callback(i+1, len(file_list), file_path, None, str(e))
+                    # Call the callback if provided
+                    if callback:
+                        callback(completed, total, file_path, file_results)
+                        
+                except Exception as e:
+                    print(f"Error analyzing {file_path}: {e}")
+                    results[i] = BatchItem(file_path, error=str(e))
+                    
+                    # Call the callback with error
+                    if callback:
+                        callback(completed, total, file_path, None, str(e))
+        
+        # Keep the last file's results available for generate_description()
+        if results and results[-1].results is not None:
+            self.results = results[-1].results
         
-        return results
\ No newline at end of file
+        return results
+
+
+# Per-process analyzer used by batch_analyze workers
+_worker_analyzer = None
+
+def _init_worker(deep_features, use_gpu):
+    global _worker_analyzer
+    _worker_analyzer = AudioAnalyzer(deep_features=deep_features, use_gpu=use_gpu)
+
+def _analyze_in_worker(file_path, file_name, keep_audio):
+    results = _worker_analyzer.analyze_audio(file_path, file_name=file_name)
+    if not keep_audio:
+        results.pop('audio', None)
+    return results
@@ -1,11 +1,12 @@
 import os
+import threading
+import numpy as np
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QSplitter)
-from PyQt5.QtCore import Qt, pyqtSlot
-import essentia.standard as es
+from PyQt5.QtCore import Qt, QTimer, QThreadPool, pyqtSlot
 
 from .panels import ControlPanel, VisualizationPanel, VideoVisualizationPanel
-from ..utils.helpers import AnalyzerThread
+from ..utils.helpers import AnalyzerRunnable
 
 class AudioAnalyzerApp(QMainWindow):
     def __init__(self, analyzer):
@@ -14,6 +15,13 @@ class AudioAnalyzerApp(QMainWindow):
         self.current_audio = None
         self.current_file_path = None  # NEW: Track current file path
         self.results = None
+        self._cached_spec = None  # Spectrum of current_audio, shared by the plots
+        self._pending_text = {}  # Text box updates waiting for _flush_text
+        # One persistent worker thread for analyses; a new request cancels the
+        # previous one through its event
+        self._analysis_pool = QThreadPool()
+        self._analysis_pool.setMaxThreadCount(1)
+        self._analysis_cancel = threading.Event()
         self.setWindowTitle("Audio Analyzer for LLM")
         self.setGeometry(100, 100, 1100, 700)  # Made slightly larger for new panel
         self.init_ui()
@@ -46,39 +54,51 @@ class AudioAnalyzerApp(QMainWindow):
     
     def analyze_audio(self, file_path):
         if file_path == "No file selected" or not os.path.exists(file_path):
-            self.control_panel.results_text.setText("Please select a valid audio file first.")
+            self._set_text(self.control_panel.results_text, "Please select a valid audio file first.")
             return
         
         # NEW: Store the current file path and enable visualization immediately
         self.current_file_path = file_path
         self.video_viz_panel.set_audio_file(file_path)  # Enable visualization right away
         
-        self.control_panel.results_text.setText("Analyzing audio...")
-        self.control_panel.description_text.setText("")
+        self._cached_spec = None
+        self._set_text(self.control_panel.results_text, "Analyzing audio...")
+        self._set_text(self.control_panel.description_text, "")
         
-        self.analysis_thread = AnalyzerThread(file_path, self.analyzer)
-        self.analysis_thread.analysis_complete.connect(self.update_results)
-        self.analysis_thread.analysis_error.connect(self.show_error)
-        self.analysis_thread.start()
+        # Drop a queued analysis and silence a running one
+        self._analysis_pool.clear()
+        self._analysis_cancel.set()
+        self._analysis_cancel = threading.Event()
+        
+        job = AnalyzerRunnable(file_path, self.analyzer, self._analysis_cancel)
+        job.signals.analysis_complete.connect(self.update_results)
+        job.signals.analysis_error.connect(self.show_error)
+        self._analysis_pool.start(job)
     
     @pyqtSlot(dict)
     def update_results(self, results):
         self.results = results
-        self.current_audio = results.get('audio')
-        
-        # Update results text
-        result_text = f"Key: {results['key']}\n"
-        result_text += f"BPM: {results['bpm']}\n"
-        result_text += f"Loudness: {results['loudness']} dB\n"
-        result_text += f"Dissonance: {results['dissonance']}\n\n"
-        result_text += f"Detected Mood: {', '.join(results['mood'][:5])}\n\n"
-        result_text += f"Detected Instruments: {', '.join(results['instruments'])}"
+        # Normalise once to the contiguous float32 buffer Essentia works on
+        # (a no-op for MonoLoader output), so the plots never have to copy it
+        audio = results.get('audio')
+        self.current_audio = None if audio is None else np.ascontiguousarray(audio, dtype=np.float32)
+        self._cached_spec = None
         
-        self.control_panel.results_text.setText(result_text)
+        # Update results text in one go
+        self._set_text(self.control_panel.results_text, "\n".join((
+            f"Key: {results['key']}",
+            f"BPM: {results['bpm']}",
+            f"Loudness: {results['loudness']} dB",
+            f"Dissonance: {results['dissonance']}",
+            "",
+            f"Detected Mood: {', '.join(results['mood'][:5])}",
+            "",
+            f"Detected Instruments: {', '.join(results['instruments'])}",
+        )))
         
         # Generate description
         description = self.analyzer.generate_description()
-        self.control_panel.description_text.setText(description)
+        self._set_text(self.control_panel.description_text, description)
         
         # Show spectrum visualization
         self.visualization_panel.show_spectrum(self.current_audio, self.analyzer.sample_rate)
@@ -87,17 +107,35 @@ class AudioAnalyzerApp(QMainWindow):
         if self.current_file_path:
             self.video_viz_panel.set_audio_file(self.current_file_path)
     
+    def _set_text(self, text_edit, text):
+        """Queue text for one of the text boxes. Updates made within a frame
+        (16 ms) are applied together, each box laid out once with its final text"""
+        if not self._pending_text:
+            QTimer.singleShot(16, self._flush_text)
+        self._pending_text[text_edit] = text
+    
+    def _flush_text(self):
+        pending, self._pending_text = self._pending_text, {}
+        for text_edit, text in pending.items():
+            text_edit.setPlainText(text)
+    
+    def get_spectrum(self, audio):
+        """Cached spectrum of audio if it is the current audio, else None"""
+        return self._cached_spec if audio is self.current_audio else None
+    
+    def set_spectrum(self, audio, spec):
+        """Remember the spectrum computed for audio so every plot can reuse it"""
+        if audio is self.current_audio:
+            self._cached_spec = spec
+    
     @pyqtSlot(str)
     def show_error(self, error_msg):
-        self.control_panel.results_text.setText(
+        self._set_text(
+            self.control_panel.results_text,
             f"Error during analysis: {error_msg}\n\nPlease try a different audio file or format."
         )
         
-        canvas = self.visualization_panel.canvas
-        canvas.ax.clear()
-        canvas.ax.text(0.5, 0.5, "Analysis failed - No visualization available", 
-                      horizontalalignment='center', verticalalignment='center')
-        canvas.draw()
+        self.visualization_panel.show_message("Analysis failed - No visualization available")
         
         # NEW: Clear video visualization on error
         self.video_viz_panel.clear_audio_file()
\ No newline at end of file
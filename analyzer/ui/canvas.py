@@ -1,13 +1,127 @@
-import matplotlib.pyplot as plt
+import numpy as np
+import matplotlib
+matplotlib.use('Qt5Agg')
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
+from ..utils.downsample import max_decimate
+
+# Style shared by every canvas, set once at import
+matplotlib.rcParams.update({
+    'axes.facecolor': '#F0F0F0',
+    'figure.facecolor': '#F0F0F0',
+})
+
 class MatplotlibCanvas(FigureCanvas):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.fig = plt.figure(figsize=(width, height), dpi=dpi)
+        # Plain Figure rather than pyplot: the canvas is embedded in Qt, so
+        # pyplot's figure manager and interactive-mode hooks are not needed
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.ax = self.fig.add_subplot(111)
         super(MatplotlibCanvas, self).__init__(self.fig)
         self.setParent(parent)
-        plt.rcParams.update({
-            'axes.facecolor': '#F0F0F0',
-            'figure.facecolor': '#F0F0F0',
-        })
\ No newline at end of file
+
+        # Artists are created once and updated in place; clearing the axes and
+        # rebuilding everything on each plot is most of the redraw cost.
+        # The line and bars are animated: full draws leave them out of the
+        # cached background and they are painted on top (blitting)
+        self.line, = self.ax.plot([], [], animated=True)
+        self.line_y = None  # Full-resolution data behind the (decimated) line
+        # All bars are one PolyCollection: a single artist to update and draw,
+        # instead of one Rectangle per bar
+        self.bars = PolyCollection([], facecolors='C0', animated=True, visible=False)
+        self.bars.sticky_edges.y.append(0)  # No margin below the bars, as ax.bar
+        self.ax.add_collection(self.bars, autolim=False)
+        self._bar_verts = None  # (n, 4, 2) corner buffer, reused while n is unchanged
+        self._shown = None  # Artist currently displayed
+        self._view = None  # Limits and labels of the last full draw
+        self._background = None  # Figure without the animated artists
+        self._index_axes = {}  # Length -> np.arange x positions, built once per size
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def show_line(self, y, title, xlabel, ylabel):
+        """Plot y against its index, decimated to the canvas width"""
+        self._show_only(self.line)
+        self.line_y = np.asarray(y, dtype=np.float32)
+        self._set_line_data()
+        self._finish(title, xlabel, ylabel)
+
+    def _set_line_data(self):
+        # More points than pixels only costs rendering time; keep the bucket
+        # maxima so peaks still show
+        y = self.line_y
+        width = self.width() or 800
+        if len(y) > 2 * width:
+            self.line.set_data(*max_decimate(y, width))
+        else:
+            self.line.set_data(self._index_axis(len(y)), y)
+
+    def _index_axis(self, n):
+        # The plots have fixed sizes (1025 bins, 24 mel bands, 13 MFCCs), so the
+        # x positions are allocated once per size and shared by every redraw
+        x = self._index_axes.get(n)
+        if x is None:
+            x = np.arange(n, dtype=np.float32)
+            self._index_axes[n] = x
+        return x
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Re-decimate for the new width
+        if self.line_y is not None and self.line.get_visible():
+            self._set_line_data()
+            self._background = None
+            self.draw_idle()
+
+    def show_bars(self, heights, title, xlabel, ylabel):
+        """Bar chart of heights, one bar per index"""
+        heights = np.asarray(heights, dtype=np.float32)
+        verts = self._bar_verts
+        if verts is None or len(verts) != len(heights):
+            # Bars of width 0.8 centred on each index, as ax.bar draws them
+            x = self._index_axis(len(heights))
+            verts = np.zeros((len(heights), 4, 2), dtype=np.float32)
+            verts[:, :2, 0] = (x - 0.4)[:, None]
+            verts[:, 2:, 0] = (x + 0.4)[:, None]
+            self._bar_verts = verts
+        verts[:, 1:3, 1] = heights[:, None]
+        self.bars.set_verts(verts)
+        self._show_only(self.bars)
+        self._finish(title, xlabel, ylabel)
+
+    def _show_only(self, artist):
+        self._shown = artist
+        self.line.set_visible(artist is self.line)
+        self.bars.set_visible(artist is self.bars)
+
+    def _finish(self, title, xlabel, ylabel):
+        self.ax.set_title(title)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.ax.relim(visible_only=True)
+        if self._shown is self.bars:
+            # relim skips collections, so add the bar corners by hand
+            self.ax.update_datalim(self._bar_verts.reshape(-1, 2))
+        self.ax.autoscale(enable=True)
+        
+        # If only the data changed, repaint the plot artists over the cached
+        # background instead of redrawing the axes, ticks and labels
+        view = (self._shown, self.ax.get_xlim(), self.ax.get_ylim(), title, xlabel, ylabel)
+        if view == self._view and self._background is not None:
+            self.restore_region(self._background)
+            self._draw_animated()
+            self.blit(self.fig.bbox)
+        else:
+            self._view = view
+            self._background = None
+            self.draw_idle()
+
+    def _draw_animated(self):
+        if self._shown is not None:
+            self.ax.draw_artist(self._shown)
+
+    def _on_draw(self, event):
+        # Cache the freshly drawn static figure, then add the animated artists
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
@@ -1,12 +1,27 @@
 import os
+from functools import lru_cache, partial
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                            QLabel, QFileDialog, QTextEdit, QGroupBox, QApplication,
-                           QComboBox, QSpinBox, QDoubleSpinBox)
-from PyQt5.QtGui import QClipboard
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-import essentia.standard as es
+                           QComboBox, QSpinBox, QDoubleSpinBox, QStackedWidget)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 
 from .canvas import MatplotlibCanvas
+from ..utils.dsp import hann_window, average_spectrum, mel_filterbank, mel_energies, mfcc_from_mel
+
+# Short-time analysis for the spectrum/mel/MFCC plots: frames are averaged, so
+# the spectrum has a fixed 1025 bins whatever the length of the audio
+_FRAME_SIZE = 2048
+_HOP_SIZE = 1024
+# Band counts of Essentia's MelBands and MFCC defaults, which these plots used
+_MEL_BANDS = 24
+_MFCC_BANDS = 40
+_MFCC_COEFFICIENTS = 13
+
+@lru_cache(maxsize=None)
+def _visualization_generator():
+    """The VisualizationGenerator shared by every video run, imported on first use"""
+    from ..visualizer import VisualizationGenerator  # Pulls in Essentia and OpenCV
+    return VisualizationGenerator()
 
 class ControlPanel(QWidget):
     def __init__(self, parent=None):
@@ -89,139 +104,186 @@ class ControlPanel(QWidget):
             clipboard.setText(description)
 
 
+class VizSignals(QObject):
+    """Signals for VizWorker (QRunnable is not a QObject)"""
+    result = pyqtSignal(int, str, object, object, object)  # request, kind, audio, spectrum, data
+    error = pyqtSignal(int, str, str)  # request, kind, message
+
+
+class VizWorker(QRunnable):
+    """Computes the data for one VisualizationPanel plot on the global thread pool"""
+    
+    def __init__(self, panel, request, kind, audio, sample_rate, spectrum=None):
+        super().__init__()
+        self.panel = panel
+        self.request = request  # Panel request number, echoed back with the result
+        self.kind = kind
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.spectrum = spectrum  # Reused if the spectrum is already cached
+        self.signals = VizSignals()
+    
+    def run(self):
+        try:
+            spec = self.spectrum
+            if spec is None:
+                spec = self.panel.compute_spectrum(self.audio)
+            
+            if self.kind == 'spectrum':
+                data = spec
+            elif self.kind == 'melbands':
+                data = self.panel.compute_melbands(spec, self.sample_rate)
+            else:
+                data = self.panel.compute_mfcc(spec, self.sample_rate)
+            
+            self.signals.result.emit(self.request, self.kind, self.audio, spec, data)
+        except Exception as e:
+            self.signals.error.emit(self.request, self.kind, str(e))
+
+
 class VisualizationPanel(QWidget):
+    # Console prefix and on-canvas message for a failed plot of each kind
+    _ERROR_MESSAGES = {
+        'spectrum': ("Error displaying spectrum", "Unable to display spectrum"),
+        'melbands': ("Error displaying mel bands", "Unable to display mel bands"),
+        'mfcc': ("Error displaying MFCC", "Unable to display MFCC coefficients"),
+    }
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        # Number of the latest plot request; results of earlier ones are dropped
+        self._request = 0
         self.init_ui()
+    
+    def compute_spectrum(self, audio):
+        """Average magnitude spectrum over Hann-windowed frames of the signal"""
+        return average_spectrum(audio, hann_window(_FRAME_SIZE), _HOP_SIZE)
+    
+    def compute_melbands(self, spec, sample_rate):
+        """Mel band energies of a spectrum"""
+        return mel_energies(spec, self._filterbank(spec, sample_rate, _MEL_BANDS))
+    
+    def compute_mfcc(self, spec, sample_rate):
+        """MFCC coefficients of a spectrum"""
+        energies = mel_energies(spec, self._filterbank(spec, sample_rate, _MFCC_BANDS))
+        return mfcc_from_mel(energies, _MFCC_COEFFICIENTS)
+    
+    def _filterbank(self, spec, sample_rate, n_mels):
+        # Calculate Nyquist frequency and set high bound safely
+        high_freq_bound = min(22000, sample_rate / 2 - 50)
+        if high_freq_bound <= 0:
+            raise ValueError(f"Sample rate too low for mel bands: {sample_rate}")
+        return mel_filterbank(sample_rate, 2 * (len(spec) - 1), n_mels, high_freq_bound)
         
     def init_ui(self):
         layout = QVBoxLayout()
         
-        # Matplotlib canvas for visualizations
+        # Matplotlib canvas for visualizations, stacked with a plain label for
+        # error messages so showing one never needs a Matplotlib render
         self.canvas = MatplotlibCanvas(self)
+        self.message_label = QLabel()
+        self.message_label.setAlignment(Qt.AlignCenter)
+        self.message_label.setStyleSheet("background-color: #F0F0F0;")
+        self.plot_stack = QStackedWidget()
+        self.plot_stack.addWidget(self.canvas)
+        self.plot_stack.addWidget(self.message_label)
         
         # Buttons for different visualizations
         button_layout = QHBoxLayout()
         
         spectrum_button = QPushButton("Spectrum")
-        spectrum_button.clicked.connect(lambda: self.show_spectrum(self.parent.current_audio, self.parent.analyzer.sample_rate))
+        spectrum_button.clicked.connect(self._do_spectrum)
         
         melbands_button = QPushButton("Mel Bands")
-        melbands_button.clicked.connect(lambda: self.show_melbands(self.parent.current_audio, self.parent.analyzer.sample_rate))
+        melbands_button.clicked.connect(self._do_melbands)
         
         mfcc_button = QPushButton("MFCC")
-        mfcc_button.clicked.connect(lambda: self.show_mfcc(self.parent.current_audio, self.parent.analyzer.sample_rate))
+        mfcc_button.clicked.connect(self._do_mfcc)
         
         button_layout.addWidget(spectrum_button)
         button_layout.addWidget(melbands_button)
         button_layout.addWidget(mfcc_button)
         
         # Add widgets to layout
-        layout.addWidget(self.canvas)
+        layout.addWidget(self.plot_stack)
         layout.addLayout(button_layout)
         
         self.setLayout(layout)
     
+    # Button handlers: plot the audio currently loaded in the main window
+    def _do_spectrum(self):
+        self._defer_plot(self.show_spectrum)
+    
+    def _do_melbands(self):
+        self._defer_plot(self.show_melbands)
+    
+    def _do_mfcc(self):
+        self._defer_plot(self.show_mfcc)
+    
+    def _defer_plot(self, show):
+        # Start the plot on the next event-loop pass, so the released button
+        # and any pending status text are painted before the work begins
+        parent = self.parent
+        QTimer.singleShot(0, partial(show, parent.current_audio, parent.analyzer.sample_rate))
+    
     def show_spectrum(self, audio, sample_rate):
-        if audio is None:
-            return
-            
-        try:
-            # Ensure audio has even length
-            if len(audio) % 2 != 0:
-                audio = audio[:-1]
-                
-            spectrum = es.Spectrum()
-            spec = spectrum(audio)
-            
-            self.canvas.ax.clear()
-            self.canvas.ax.plot(spec[:len(spec)//2])
-            self.canvas.ax.set_title("Audio Spectrum")
-            self.canvas.ax.set_xlabel("Frequency Bin")
-            self.canvas.ax.set_ylabel("Magnitude")
-            
-            self.canvas.draw()
-        except Exception as e:
-            print(f"Error displaying spectrum: {e}")
-            self.canvas.ax.clear()
-            self.canvas.ax.text(0.5, 0.5, "Unable to display spectrum", 
-                              horizontalalignment='center', verticalalignment='center')
-            self.canvas.draw()
+        self._start_worker('spectrum', audio, sample_rate)
     
     def show_melbands(self, audio, sample_rate):
-        if audio is None:
-            return
-            
-        try:
-            # Ensure audio has even length
-            if len(audio) % 2 != 0:
-                audio = audio[:-1]
-                
-            # Calculate Nyquist frequency and set high bound safely
-            nyquist_freq = sample_rate / 2
-            high_freq_bound = min(22000, nyquist_freq - 50)
-                
-            spectrum = es.Spectrum()
-            mel_bands = es.MelBands(inputSize=len(audio) // 2 + 1,
-                                  highFrequencyBound=high_freq_bound)
-            spec = spectrum(audio)
-            bands = mel_bands(spec)
-            
-            self.canvas.ax.clear()
-            self.canvas.ax.bar(range(len(bands)), bands)
-            self.canvas.ax.set_title("Mel Bands")
-            self.canvas.ax.set_xlabel("Mel Band")
-            self.canvas.ax.set_ylabel("Magnitude")
-            
-            self.canvas.draw()
-        except Exception as e:
-            print(f"Error displaying mel bands: {e}")
-            self.canvas.ax.clear()
-            self.canvas.ax.text(0.5, 0.5, "Unable to display mel bands", 
-                              horizontalalignment='center', verticalalignment='center')
-            self.canvas.draw()
+        self._start_worker('melbands', audio, sample_rate)
     
     def show_mfcc(self, audio, sample_rate):
+        self._start_worker('mfcc', audio, sample_rate)
+    
+    def _start_worker(self, kind, audio, sample_rate):
+        """Compute the plot data off the GUI thread; only drawing happens here"""
         if audio is None:
             return
-            
-        try:
-            # Ensure audio has even length
-            if len(audio) % 2 != 0:
-                audio = audio[:-1]
-                
-            # Calculate Nyquist frequency and set high bound safely
-            nyquist_freq = sample_rate / 2
-            high_freq_bound = min(22000, nyquist_freq - 50)
-                
-            spectrum = es.Spectrum()
-            mfcc = es.MFCC(inputSize=len(audio) // 2 + 1,
-                         highFrequencyBound=high_freq_bound)
-            spec = spectrum(audio)
-            mfcc_bands = mfcc(spec)[1]
-            
-            self.canvas.ax.clear()
-            self.canvas.ax.bar(range(len(mfcc_bands)), mfcc_bands)
-            self.canvas.ax.set_title("MFCC Coefficients")
-            self.canvas.ax.set_xlabel("MFCC Coefficient")
-            self.canvas.ax.set_ylabel("Value")
-            
-            self.canvas.draw()
-        except Exception as e:
-            print(f"Error displaying MFCC: {e}")
-            self.canvas.ax.clear()
-            self.canvas.ax.text(0.5, 0.5, "Unable to display MFCC coefficients", 
-                              horizontalalignment='center', verticalalignment='center')
-            self.canvas.draw()
+        
+        self._request += 1
+        worker = VizWorker(self, self._request, kind, audio, sample_rate,
+                           self.parent.get_spectrum(audio))
+        worker.signals.result.connect(self._on_result)
+        worker.signals.error.connect(self._on_error)
+        QThreadPool.globalInstance().start(worker)
+    
+    def show_message(self, text):
+        """Replace the plot with a centred message"""
+        self.message_label.setText(text)
+        self.plot_stack.setCurrentWidget(self.message_label)
+    
+    def _on_result(self, request, kind, audio, spec, data):
+        self.parent.set_spectrum(audio, spec)
+        # Workers can finish out of order: never paint over a newer request's plot
+        if request != self._request:
+            return
+        self.plot_stack.setCurrentWidget(self.canvas)
+        if kind == 'spectrum':
+            self.canvas.show_line(data, "Audio Spectrum", "Frequency Bin", "Magnitude")
+        elif kind == 'melbands':
+            self.canvas.show_bars(data, "Mel Bands", "Mel Band", "Magnitude")
+        else:
+            self.canvas.show_bars(data, "MFCC Coefficients", "MFCC Coefficient", "Value")
+    
+    def _on_error(self, request, kind, message):
+        log_prefix, canvas_message = self._ERROR_MESSAGES[kind]
+        print(f"{log_prefix}: {message}")
+        if request != self._request:
+            return
+        self.show_message(canvas_message)
 
 
-# NEW: Video Visualization Thread
-class VisualizationThread(QThread):
-    """Thread for generating visualizations without blocking UI"""
+class VisualizationSignals(QObject):
+    """Signals for VisualizationRunnable (QRunnable is not a QObject)"""
     progress = pyqtSignal(str)  # Progress messages
     finished = pyqtSignal(str)  # Completion message with file path
     error = pyqtSignal(str)     # Error messages
+
+
+# NEW: Video Visualization job
+class VisualizationRunnable(QRunnable):
+    """Job for generating visualizations on the thread pool without blocking UI"""
     
     def __init__(self, audio_file, output_file, duration, fps, style):
         super().__init__()
@@ -230,30 +292,31 @@ class VisualizationThread(QThread):
         self.duration = duration
         self.fps = fps
         self.style = style
+        self.signals = VisualizationSignals()
     
     def run(self):
+        signals = self.signals
         try:
-            from ..visualizer import VisualizationGenerator
-            
-            self.progress.emit("Initializing visualization generator...")
-            generator = VisualizationGenerator()
+            signals.progress.emit("Initializing visualization generator...")
+            generator = _visualization_generator()
             
-            self.progress.emit("Processing audio and generating frames...")
+            signals.progress.emit("Processing audio and generating frames...")
             result = generator.create_visualization_video(
                 self.audio_file,
                 self.output_file,
                 self.duration,
                 self.fps,
-                self.style
+                self.style,
+                progress=signals.progress.emit
             )
             
             if result:
-                self.finished.emit(f"Visualization saved: {result}")
+                signals.finished.emit(f"Visualization saved: {result}")
             else:
-                self.error.emit("Failed to generate visualization")
+                signals.error.emit("Failed to generate visualization")
                 
         except Exception as e:
-            self.error.emit(f"Error: {str(e)}")
+            signals.error.emit(f"Error: {str(e)}")
 
 
 # NEW: Video Visualization Control Panel
@@ -267,7 +330,7 @@ class VideoVisualizationPanel(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.current_audio_file = None
-        self.visualization_thread = None
+        self.visualization_job = None
         self.init_ui()
     
     def init_ui(self):
@@ -322,7 +385,11 @@ class VideoVisualizationPanel(QWidget):
     def set_audio_file(self, audio_file_path):
         """Called when an audio file is selected (no analysis required)"""
         self.current_audio_file = audio_file_path
-        self.generate_btn.setEnabled(True)
+        # Import the generator in the background now, so the first Generate
+        # click does not wait for it
+        QThreadPool.globalInstance().start(_visualization_generator)
+        # The shared generator renders one video at a time
+        self.generate_btn.setEnabled(self.visualization_job is None)
         self.status_label.setText(f"Ready to visualize: {os.path.basename(audio_file_path)}")
         self.status_label.setStyleSheet("color: green;")
     
@@ -354,8 +421,8 @@ class VideoVisualizationPanel(QWidget):
         self.status_label.setText("Generating visualization...")
         self.status_label.setStyleSheet("color: blue;")
         
-        # Start visualization in separate thread
-        self.visualization_thread = VisualizationThread(
+        # Run the visualization on the shared thread pool
+        self.visualization_job = VisualizationRunnable(
             self.current_audio_file,
             output_file,
             duration,
@@ -364,12 +431,13 @@ class VideoVisualizationPanel(QWidget):
         )
         
         # Connect signals
-        self.visualization_thread.progress.connect(self.on_progress)
-        self.visualization_thread.finished.connect(self.on_finished)
-        self.visualization_thread.error.connect(self.on_error)
+        signals = self.visualization_job.signals
+        signals.progress.connect(self.on_progress)
+        signals.finished.connect(self.on_finished)
+        signals.error.connect(self.on_error)
         
-        # Start the thread
-        self.visualization_thread.start()
+        # Start the job
+        QThreadPool.globalInstance().start(self.visualization_job)
     
     def on_progress(self, message):
         """Handle progress updates"""
@@ -381,11 +449,11 @@ class VideoVisualizationPanel(QWidget):
         self.status_label.setText(message)
         self.status_label.setStyleSheet("color: green;")
         self.generate_btn.setEnabled(True)
-        self.visualization_thread = None
+        self.visualization_job = None
     
     def on_error(self, error_message):
         """Handle errors"""
         self.status_label.setText(f"Error: {error_message}")
         self.status_label.setStyleSheet("color: red;")
         self.generate_btn.setEnabled(True)
-        self.visualization_thread = None
+        self.visualization_job = None
@@ -1,6 +1,9 @@
 # Make the utils module a package
-# This allows imports like: from analyzer.utils import AnalyzerThread
+# This allows imports like: from analyzer.utils import AnalyzerRunnable
 
-from .helpers import AnalyzerThread
+from .helpers import AnalyzerRunnable
+from .downsample import max_decimate
+from .dsp import hann_window, average_spectrum, mel_filterbank, mel_energies, mfcc_from_mel
 
-__all__ = ['AnalyzerThread']
\ No newline at end of file
+__all__ = ['AnalyzerRunnable', 'max_decimate', 'hann_window', 'average_spectrum',
+           'mel_filterbank', 'mel_energies', 'mfcc_from_mel']
\ No newline at end of file
@@ -0,0 +1,12 @@
+import numpy as np
+
+def max_decimate(y, n_out):
+    """Reduce y to n_out points by taking the maximum of each equal-sized bucket.
+    
+    Peaks survive, so a decimated magnitude plot looks the same at screen
+    resolution. Returns (x, values) where x is the index of each bucket's start;
+    trailing samples that do not fill a whole bucket are dropped.
+    """
+    step = len(y) // n_out
+    values = np.asarray(y)[:step * n_out].reshape(n_out, step).max(axis=1)
+    return np.arange(0, step * n_out, step, dtype=np.float32), values
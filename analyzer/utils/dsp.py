@@ -0,0 +1,72 @@
+from functools import lru_cache
+import numpy as np
+from scipy.fft import dct, rfft
+
+# Frames transformed per batched rfft; bounds the temporary frame matrix to a
+# few MB however long the signal is
+_BLOCK_FRAMES = 256
+
+@lru_cache(maxsize=None)
+def hann_window(size):
+    """Essentia's normalised Hann window (symmetric, scaled to sum to 2), built
+    once per size, so batched spectra match Windowing + Spectrum"""
+    window = np.hanning(size)
+    window *= 2 / window.sum()
+    window = window.astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+def average_spectrum(audio, window, hop_size):
+    """Mean magnitude spectrum of the windowed frames of audio.
+    
+    Frames are centred on multiples of hop_size starting at sample 0 (the
+    signal is zero-padded by half a frame at both ends, as Essentia's
+    FrameGenerator does) and transformed in blocks with one rfft call each,
+    using SciPy's pocketfft threaded over all CPU cores.
+    """
+    frame_size = len(window)
+    half = frame_size // 2
+    padded = np.pad(np.asarray(audio, dtype=np.float32), (half, half))
+    if len(padded) < frame_size:
+        padded = np.pad(padded, (0, frame_size - len(padded)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, frame_size)[::hop_size]
+    
+    window = np.asarray(window, dtype=np.float32)
+    total = np.zeros(half + 1, dtype=np.float32)
+    for start in range(0, len(frames), _BLOCK_FRAMES):
+        block = frames[start:start + _BLOCK_FRAMES] * window  # float32 in, complex64 out
+        total += np.abs(rfft(block, axis=1, workers=-1)).sum(axis=0)
+    total /= len(frames)
+    return total
+
+@lru_cache(maxsize=None)
+def mel_filterbank(sample_rate, n_fft, n_mels, fmax):
+    """Slaney-style mel filterbank as a float32 (n_mels, n_fft // 2 + 1) matrix.
+    
+    Built once per configuration; the returned array is shared, so callers
+    must not modify it.
+    """
+    import librosa  # Slow to import; only needed once a mel plot is requested
+    fb = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels,
+                             fmax=fmax, dtype=np.float32)
+    fb.setflags(write=False)
+    return fb
+
+def mel_energies(spectrum, filterbank):
+    """Mel band energies of a magnitude spectrum (filterbank applied to its power)"""
+    spectrum = np.asarray(spectrum, dtype=np.float32)
+    return filterbank @ (spectrum * spectrum)
+
+@lru_cache(maxsize=None)
+def _dct_matrix(n_bands, n_coefficients):
+    # First n_coefficients rows of the orthonormal DCT-II matrix, so the
+    # coefficients are one small matrix-vector product
+    matrix = dct(np.eye(n_bands), type=2, norm='ortho', axis=0)[:n_coefficients]
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    matrix.setflags(write=False)
+    return matrix
+
+def mfcc_from_mel(energies, n_coefficients=13):
+    """MFCCs of mel band energies: dB amplitude followed by an orthonormal DCT-II"""
+    log_energies = 20 * np.log10(np.maximum(energies, 1e-10), dtype=np.float32)
+    return _dct_matrix(len(log_energies), n_coefficients) @ log_energies
@@ -1,18 +1,32 @@
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
 
-class AnalyzerThread(QThread):
-    """Thread for running the audio analysis without freezing the UI"""
+class AnalyzerSignals(QObject):
+    """Signals for AnalyzerRunnable (QRunnable is not a QObject)"""
     analysis_complete = pyqtSignal(dict)
     analysis_error = pyqtSignal(str)
+
+class AnalyzerRunnable(QRunnable):
+    """Job for running the audio analysis on a thread pool without freezing the UI.
+    
+    Once cancel_event is set, the job no longer reports anything, so a
+    superseded analysis cannot overwrite the results of a newer one.
+    """
     
-    def __init__(self, file_path, analyzer):
+    def __init__(self, file_path, analyzer, cancel_event):
         super().__init__()
         self.file_path = file_path
         self.analyzer = analyzer
+        self.cancel_event = cancel_event
+        self.signals = AnalyzerSignals()
         
     def run(self):
+        if self.cancel_event.is_set():
+            return
         try:
             results = self.analyzer.analyze_audio(self.file_path)
-            self.analysis_complete.emit(results)
         except Exception as e:
-            self.analysis_error.emit(str(e))
\ No newline at end of file
+            if not self.cancel_event.is_set():
+                self.signals.analysis_error.emit(str(e))
+            return
+        if not self.cancel_event.is_set():
+            self.signals.analysis_complete.emit(results)
@@ -7,9 +7,188 @@ Adds visualization capabilities using Essentia for consistency
 import numpy as np
 import cv2
 import math
+import multiprocessing
 import os
-from typing import Dict, Optional
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
 import essentia.standard as es
+from numba import njit
+from scipy.fft import rfft
+
+from .utils.dsp import hann_window
+
+# Let OpenCV's FFmpeg backend pick a hardware encoder (NVENC, QSV, VAAPI,
+# VideoToolbox) when one is available; it falls back to software otherwise.
+# The property, and the VideoWriter overload taking a parameter list, only exist
+# in OpenCV >= 4.5.2; older versions get no parameters and the plain constructor
+_WRITER_PARAMS = ([cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+                  if hasattr(cv2, 'VIDEOWRITER_PROP_HW_ACCELERATION') else [])
+
+# ffmpeg encoders in order of preference: hardware H.264, software H.264, and
+# MPEG-4 part 2, which every ffmpeg build has
+_FFMPEG_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox', 'libx264', 'mpeg4')
+
+# Extra ffmpeg output options per encoder. libx264 encodes on the CPU that is
+# also rendering the frames, so it uses its fastest preset
+_FFMPEG_ENCODER_OPTIONS = {'libx264': ['-preset', 'ultrafast']}
+
+@lru_cache(maxsize=None)
+def _ffmpeg_encoder():
+    """(ffmpeg path, encoder name) for the best working encoder, or None.
+    
+    Builds often list hardware encoders with no device behind them, so each
+    listed candidate is checked by encoding one test frame. Probed once per run
+    of the application.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return None
+    try:
+        listed = subprocess.run([ffmpeg, '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, timeout=10).stdout
+        for encoder in _FFMPEG_ENCODERS:
+            if f' {encoder} ' not in listed:
+                continue
+            test = subprocess.run([ffmpeg, '-hide_banner', '-loglevel', 'error',
+                                   '-f', 'lavfi', '-i', 'color=size=256x256', '-frames:v', '1',
+                                   '-c:v', encoder, '-pix_fmt', 'yuv420p', '-f', 'null', '-'],
+                                  capture_output=True, timeout=10)
+            if test.returncode == 0:
+                return ffmpeg, encoder
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return None
+
+@lru_cache(maxsize=None)
+def _mel_matrix(spectrum_size: int) -> np.ndarray:
+    """Filters of Essentia's default MelBands as a float32 (bands, bins) matrix.
+    
+    MelBands is linear in the power spectrum, so its filters are read off by
+    feeding it one unit spectrum per bin. Built once per spectrum size; mel
+    bands of a batch of spectra are then one matrix product with their power.
+    """
+    mel_bands = es.MelBands(inputSize=spectrum_size)
+    unit_spectra = np.eye(spectrum_size, dtype=np.float32)
+    matrix = np.stack([mel_bands(spectrum) for spectrum in unit_spectra], axis=1)
+    matrix.setflags(write=False)
+    return matrix
+
+@njit(cache=True, fastmath=True)
+def _kaleidoscope_geometry(num_segments, depths, base_radius, bass, mid, amplitude,
+                           mel_bands, time_progress, center_x, center_y, n_colors):
+    """Return one row (x, y, next_x, next_y, color index) per kaleidoscope
+    segment and depth layer, in segment-then-depth order"""
+    geometry = np.empty((num_segments * depths, 5), dtype=np.int64)
+    for i in range(num_segments):
+        # Create organic flowing radius using multiple wave functions
+        wave1 = math.sin(time_progress * 2 + i * 0.1)
+        wave2 = math.cos(time_progress * 1.5 + i * 0.15)
+        wave3 = math.sin(time_progress * 3 + i * 0.05)
+        
+        # Mel band influence on radius
+        mel_influence = mel_bands[i % mel_bands.shape[0]] * 3
+        
+        # Complex radius calculation for organic feel
+        radius_variation = base_radius * (
+            0.5 +                           # Base
+            bass * 0.008 +                  # Bass influence
+            wave1 * 0.3 +                   # Primary wave
+            wave2 * 0.2 +                   # Secondary wave
+            wave3 * 0.1 +                   # Tertiary wave
+            mel_influence * 0.3 +           # Mel band influence
+            amplitude * 0.01                # Amplitude influence
+        )
+        
+        # Each segment connects to the next one round the circle
+        angle_rad = math.radians((360 / num_segments) * i + time_progress * 10)
+        next_angle_rad = math.radians((360 / num_segments) * ((i + 1) % num_segments) + time_progress * 10)
+        
+        # Multiple depth layers for kaleidoscope effect
+        for depth in range(depths):
+            depth_scale = 0.2 + depth * 0.16  # 0.2, 0.36, 0.52, 0.68, 0.84, 1.0
+            layer_radius = radius_variation * depth_scale
+            
+            # Calculate flowing positions with multiple wave offsets
+            wave_offset_x = math.sin(time_progress * 1.8 + i * 0.25 + depth * 0.1) * (5 + bass * 0.1)
+            wave_offset_y = math.cos(time_progress * 2.2 + i * 0.3 + depth * 0.15) * (5 + mid * 0.1)
+            
+            row = geometry[i * depths + depth]
+            row[0] = int(center_x + math.cos(angle_rad) * layer_radius + wave_offset_x)
+            row[1] = int(center_y + math.sin(angle_rad) * layer_radius + wave_offset_y)
+            row[2] = int(center_x + math.cos(next_angle_rad) * layer_radius + wave_offset_x)
+            row[3] = int(center_y + math.sin(next_angle_rad) * layer_radius + wave_offset_y)
+            
+            # Color cycling with time and depth
+            color_phase = (time_progress * 0.3 + i * 0.02 + depth * 0.1) % 1
+            row[4] = int(color_phase * n_colors) % n_colors
+    return geometry
+
+class FFmpegWriter:
+    """Streams raw BGR frames to an ffmpeg process through its stdin.
+    
+    Offers the isOpened/write/release subset of cv2.VideoWriter used by
+    create_visualization_video; nothing is written to disk but the video.
+    """
+    
+    def __init__(self, ffmpeg: str, encoder: str, output_file: str, fps: int, size):
+        width, height = size
+        self.output_file = output_file
+        self.process = subprocess.Popen(
+            [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+             '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps),
+             '-i', '-', '-c:v', encoder, *_FFMPEG_ENCODER_OPTIONS.get(encoder, []),
+             '-pix_fmt', 'yuv420p', output_file],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    def isOpened(self) -> bool:
+        return self.process.poll() is None
+    
+    def write(self, frame: np.ndarray):
+        try:
+            # Contiguous frames are passed as a buffer, without a bytes copy
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.release()  # Raises with ffmpeg's error message
+            raise
+    
+    def release(self):
+        if self.process.stdin.closed:
+            return
+        _, stderr = self.process.communicate()  # Closes stdin, ffmpeg finishes the file
+        if self.process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace').strip()}")
+    
+    def close(self, abort: bool = False):
+        """Finish the video, or with abort kill ffmpeg and delete the partial file"""
+        if not abort:
+            self.release()
+            return
+        self.process.kill()
+        for pipe in (self.process.stdin, self.process.stderr):
+            try:
+                pipe.close()
+            except OSError:  # Unflushed frames can no longer reach ffmpeg
+                pass
+        self.process.wait()
+        _remove_partial_video(self.output_file)
+
+def _remove_partial_video(output_file: str):
+    try:
+        os.remove(output_file)
+    except FileNotFoundError:
+        pass
+
+def _close_video_writer(video_writer, output_file: str, abort: bool):
+    """Release a video writer; with abort, discard the unfinished video"""
+    if isinstance(video_writer, FFmpegWriter):
+        video_writer.close(abort=abort)
+        return
+    video_writer.release()
+    if abort:
+        _remove_partial_video(output_file)
 
 class VisualizationGenerator:
     """
@@ -21,64 +200,141 @@ class VisualizationGenerator:
         self.height = height
         self.center = (width // 2, height // 2)
         
-        # Initialize Essentia algorithms (consistent with your existing code)
+        # Spectra and mel bands are computed in batches with NumPy, see
+        # extract_features
         # Note: MonoLoader will be created per-file in create_visualization_video
-        self.windowing = es.Windowing(type='hann')
-        self.spectrum = es.Spectrum()
-        self.mel_bands = es.MelBands()
-        self.mfcc = es.MFCC()
+        
+        # Angles of the regular partitions of the circle and their cosines and
+        # sines, shared by all frames (see _angle_grid and _unit_circle)
+        self._angle_grids = {}
+        self._unit_circles = {}
+        
+        # Drawing canvas reused by the mandala and kaleidoscope frames, which
+        # return a blurred copy so the buffer never leaves the generator, and
+        # the mandala's gradient overlay. A generator therefore renders one
+        # frame at a time
+        self._scratch_img = np.zeros((height, width, 3), dtype=np.uint8)
+        self._scratch_overlay = np.zeros_like(self._scratch_img)
+        
+        # Petal outline profile along the petal (t from 0 to 1 over 36 steps).
+        # Only odd steps add outline points (one per side), so only those are kept
+        t = np.arange(1, 36, 2) / 35.0
+        self._petal_t = t
+        self._petal_curve = np.sin(t * np.pi)  # Basic petal shape
+        self._petal_radius_profile = 0.2 + 0.8 * t
+        # Angular offsets of the left and right sides - wider at base, narrower
+        # at tip, 15 degrees max width
+        petal_width = np.sin(t * np.pi) * 0.8
+        petal_side_offsets = np.radians(np.array([-1, 1])[None, :] * petal_width[:, None] * 15)
+        self._petal_side_cos = np.cos(petal_side_offsets)
+        self._petal_side_sin = np.sin(petal_side_offsets)
         
         # Color palettes for different styles
         self.color_palettes = {
             'neon': [(255, 0, 255), (0, 255, 255), (255, 255, 0), (0, 255, 0), (255, 0, 128), (128, 255, 0)],
             'plasma': [(255, 0, 100), (255, 100, 0), (100, 255, 0), (0, 100, 255), (255, 150, 50), (150, 50, 255)]
         }
+        # The mandala's concentric center rings dim inwards by a fixed step, so
+        # their colors never change
+        self._center_ring_colors = self._tint(self.color_palettes['neon'][:5],
+                                              (1.0 - np.arange(5) * 0.15)[:, None])
     
-    def extract_frame_features(self, audio: np.ndarray, frame_start: int, frame_size: int = 2048) -> Dict:
-        """Extract audio features using Essentia for consistency"""
-        frame_end = min(frame_start + frame_size, len(audio))
-        frame_audio = audio[frame_start:frame_end]
+    def _angle_grid(self, n: int) -> np.ndarray:
+        """Angles in degrees splitting the circle into n equal parts, built once per n"""
+        angles = self._angle_grids.get(n)
+        if angles is None:
+            angles = (360 / n) * np.arange(n)
+            angles.setflags(write=False)
+            self._angle_grids[n] = angles
+        return angles
+    
+    def _unit_circle(self, n: int, rotation: float = 0.0):
+        """Cosines and sines of the n-part angle grid turned by rotation degrees.
         
-        if len(frame_audio) < frame_size:
-            frame_audio = np.pad(frame_audio, (0, frame_size - len(frame_audio)))
+        The grid's own table is built once per n; the rotation is applied with
+        the angle-addition identities, so a frame only evaluates trig for the
+        rotation itself.
+        """
+        table = self._unit_circles.get(n)
+        if table is None:
+            angle_rad = np.radians(self._angle_grid(n))
+            table = (np.cos(angle_rad), np.sin(angle_rad))
+            self._unit_circles[n] = table
+        cos_grid, sin_grid = table
+        rotation_rad = math.radians(rotation)
+        cos_rotation, sin_rotation = math.cos(rotation_rad), math.sin(rotation_rad)
+        return (cos_grid * cos_rotation - sin_grid * sin_rotation,
+                sin_grid * cos_rotation + cos_grid * sin_rotation)
+    
+    def _polar_points(self, cos_a: np.ndarray, sin_a: np.ndarray, radius) -> np.ndarray:
+        """Integer (x, y) pixels at the given angle cosines/sines and radius from
+        the center.
         
-        # Apply windowing and get spectrum using Essentia
-        windowed = self.windowing(frame_audio)
-        spectrum = self.spectrum(windowed)
+        radius may be an array broadcasting against the angles; the result has
+        their broadcast shape with a trailing xy axis.
+        """
+        return np.stack([self.center[0] + cos_a * radius,
+                         self.center[1] + sin_a * radius], axis=-1).astype(int)
+    
+    @staticmethod
+    def _tint(colors, brightness) -> list:
+        """Colors scaled by brightness and truncated to ints, as cv2 color lists.
+        
+        Scales a whole palette in one NumPy operation instead of a tuple
+        comprehension per drawn shape. brightness may be an array that
+        broadcasts against the (colors, 3) palette.
+        """
+        return (np.asarray(colors) * brightness).astype(int).tolist()
+    
+    def extract_features(self, audio: np.ndarray, frame_starts: List[int],
+                         frame_size: int = 2048) -> List[Dict]:
+        """Extract the features of every video frame in one batch.
+        
+        The frames are gathered into one matrix and their spectra computed by a
+        single windowed rfft (the magnitudes of Essentia's Windowing + Spectrum);
+        frames running past the end of the audio are zero-padded. Mel bands are
+        one product with the cached MelBands filter matrix.
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        starts = np.minimum(np.asarray(frame_starts, dtype=np.int64), len(audio))
+        
+        # Frames inside the audio are gathered straight from it; only the few
+        # running past its end are copied into their zero-padded rows, so the
+        # audio itself is never copied
+        frames = np.zeros((len(starts), frame_size), dtype=np.float32)
+        whole = starts + frame_size <= len(audio)
+        if whole.any():
+            frames[whole] = np.lib.stride_tricks.sliding_window_view(audio, frame_size)[starts[whole]]
+        for i in np.flatnonzero(~whole):
+            tail = audio[starts[i]:]
+            frames[i, :len(tail)] = tail
+        
+        spectra = np.abs(rfft(frames * hann_window(frame_size), axis=1, workers=-1))
+        amplitudes = np.abs(frames).mean(axis=1)
+        
+        # Extract meaningful frequency bands as spectrum indices
+        spectrum_size = spectra.shape[1]
+        bass_end = int(spectrum_size * 0.1)  # Low frequencies
+        mid_end = int(spectrum_size * 0.4)   # Mid frequencies, treble above
+        bass_energy = spectra[:, :bass_end].mean(axis=1)
+        mid_energy = spectra[:, bass_end:mid_end].mean(axis=1)
+        treble_energy = spectra[:, mid_end:].mean(axis=1)
         
         # Get mel bands for frequency analysis
-        try:
-            mel_bands = self.mel_bands(spectrum)
-            mfcc_bands, mfcc_coeffs = self.mfcc(spectrum)
-        except Exception:
-            # Fallback if Essentia fails
-            mel_bands = np.zeros(40)
-            mfcc_coeffs = np.zeros(13)
-        
-        # Extract meaningful frequency bands
-        spectrum_size = len(spectrum)
-        if spectrum_size > 0:
-            # Define frequency ranges as spectrum indices
-            bass_end = int(spectrum_size * 0.1)  # Low frequencies
-            mid_start = bass_end
-            mid_end = int(spectrum_size * 0.4)   # Mid frequencies  
-            treble_start = mid_end               # High frequencies
-            
-            bass_energy = np.mean(spectrum[:bass_end]) if bass_end > 0 else 0
-            mid_energy = np.mean(spectrum[mid_start:mid_end]) if mid_end > mid_start else 0
-            treble_energy = np.mean(spectrum[treble_start:]) if treble_start < spectrum_size else 0
-        else:
-            bass_energy = mid_energy = treble_energy = 0
-        
-        return {
-            'bass': bass_energy,
-            'mid': mid_energy, 
-            'treble': treble_energy,
-            'amplitude': np.mean(np.abs(frame_audio)),
-            'mel_bands': mel_bands,
-            'mfcc': mfcc_coeffs,
-            'spectrum': spectrum
-        }
+        mel_bands = (spectra * spectra) @ _mel_matrix(spectrum_size).T
+        
+        return [{
+            'bass': bass_energy[i],
+            'mid': mid_energy[i],
+            'treble': treble_energy[i],
+            'amplitude': amplitudes[i],
+            'mel_bands': mel_bands[i],
+            'spectrum': spectra[i]
+        } for i in range(len(spectra))]
+    
+    def extract_frame_features(self, audio: np.ndarray, frame_start: int, frame_size: int = 2048) -> Dict:
+        """Extract the audio features of the frame starting at frame_start"""
+        return self.extract_features(audio, [frame_start], frame_size)[0]
     
     def generate_sacred_geometry_frame(self, features: Dict, time_progress: float) -> np.ndarray:
         """Generate complex sacred geometry mandala like the original screenshot"""
@@ -102,164 +358,132 @@ class VisualizationGenerator:
         outer_segments = 24  # More segments for complexity
         outer_radius = base_radius * 1.0
         
+        # Color cycling
+        ring_colors = self._tint(colors, min(1.0, 0.6 + amplitude * 0.4))
+        connection_colors = self._tint(ring_colors, 0.7)
+        
+        # Outer and inner points of every segment, computed once: each
+        # segment's connections end on the inner points of later segments
+        cos_a, sin_a = self._unit_circle(outer_segments, rotation)
+        inner_radius = outer_radius * 0.75
+        outer_points = self._polar_points(cos_a, sin_a, outer_radius).tolist()
+        inner_points = self._polar_points(cos_a, sin_a, inner_radius).tolist()
+        
         for i in range(outer_segments):
-            angle = (360 / outer_segments) * i + rotation
-            angle_rad = math.radians(angle)
-            
-            # Color cycling
             color_idx = i % len(colors)
-            color = colors[color_idx]
-            brightness = min(1.0, 0.6 + amplitude * 0.4)
-            color = tuple(int(c * brightness) for c in color)
-            
-            # Create interlocking geometric shapes
-            # Outer points
-            outer_x = int(center_x + math.cos(angle_rad) * outer_radius)
-            outer_y = int(center_y + math.sin(angle_rad) * outer_radius)
-            
-            # Inner points for this segment
-            inner_radius = outer_radius * 0.75
-            inner_x = int(center_x + math.cos(angle_rad) * inner_radius)
-            inner_y = int(center_y + math.sin(angle_rad) * inner_radius)
+            color = ring_colors[color_idx]
+            outer_point = tuple(outer_points[i])
+            inner_point = tuple(inner_points[i])
             
             # Create connecting lines to multiple other points (sacred geometry)
             for connection in [3, 5, 8, 12]:  # Connect to various other points
                 if i + connection < outer_segments:
-                    connect_angle = (360 / outer_segments) * (i + connection) + rotation
-                    connect_rad = math.radians(connect_angle)
-                    connect_x = int(center_x + math.cos(connect_rad) * inner_radius)
-                    connect_y = int(center_y + math.sin(connect_rad) * inner_radius)
-                    
                     # Draw connecting line
-                    cv2.line(img, (inner_x, inner_y), (connect_x, connect_y), 
-                             tuple(int(c * 0.7) for c in color), 1)
+                    cv2.line(img, inner_point, tuple(inner_points[i + connection]),
+                             connection_colors[color_idx], 1)
             
             # Draw main radial line
-            cv2.line(img, (inner_x, inner_y), (outer_x, outer_y), color, 3)
+            cv2.line(img, inner_point, outer_point, color, 3)
             
             # Add geometric nodes
-            cv2.circle(img, (outer_x, outer_y), 3, color, -1)
+            cv2.circle(img, outer_point, 3, color, -1)
         
         # Layer 2: Middle geometric pattern - Star polygons
         mid_segments = 12
         mid_radius = base_radius * 0.7
+        star_colors = self._tint(colors, min(1.0, 0.5 + mid * 0.5))
+        
+        # Create star polygon points: 3-fold symmetry (columns) around each
+        # segment (rows). Turning by 120 degrees steps 4 segments round the
+        # grid, so every star point lies on the segment grid
+        segment = np.arange(mid_segments)[:, None]
+        star_layers = np.arange(3)
+        star_idx = (segment + star_layers * 4) % mid_segments
+        next_star_idx = (star_idx + 4) % mid_segments
+        cos_a, sin_a = self._unit_circle(mid_segments, rotation * 0.7)
+        
+        # Variable radius based on mel bands
+        mel_idx = (segment + star_layers) % len(mel_bands)
+        radius_var = mid_radius * (0.8 + np.asarray(mel_bands)[mel_idx] * 0.4)
+        
+        star_points = self._polar_points(cos_a[star_idx], sin_a[star_idx], radius_var).tolist()
+        # Connect star points to form triangles
+        next_star_points = self._polar_points(cos_a[next_star_idx], sin_a[next_star_idx],
+                                              radius_var).tolist()
         
         for i in range(mid_segments):
-            angle = (360 / mid_segments) * i + rotation * 0.7
-            
-            # Create star polygon points
             for star_layer in range(3):
-                star_angle = angle + star_layer * 120  # 3-fold symmetry
-                star_rad = math.radians(star_angle)
-                
-                # Variable radius based on mel bands
-                mel_idx = (i + star_layer) % len(mel_bands)
-                radius_var = mid_radius * (0.8 + mel_bands[mel_idx] * 0.4)
-                
-                star_x = int(center_x + math.cos(star_rad) * radius_var)
-                star_y = int(center_y + math.sin(star_rad) * radius_var)
-                
                 # Color for this star layer
-                color = colors[(i + star_layer) % len(colors)]
-                brightness = min(1.0, 0.5 + mid * 0.5)
-                color = tuple(int(c * brightness) for c in color)
+                color = star_colors[(i + star_layer) % len(colors)]
+                star_point = tuple(star_points[i][star_layer])
                 
                 # Draw star points
-                cv2.circle(img, (star_x, star_y), 4, color, -1)
-                
-                # Connect star points to form triangles
-                next_star_angle = star_angle + 120
-                next_star_rad = math.radians(next_star_angle)
-                next_star_x = int(center_x + math.cos(next_star_rad) * radius_var)
-                next_star_y = int(center_y + math.sin(next_star_rad) * radius_var)
-                
-                cv2.line(img, (star_x, star_y), (next_star_x, next_star_y), color, 2)
+                cv2.circle(img, star_point, 4, color, -1)
+                cv2.line(img, star_point, tuple(next_star_points[i][star_layer]), color, 2)
         
         # Layer 3: Inner geometric ring - Complex polygons
         inner_segments = 8  # Octagonal base
         inner_radius = base_radius * 0.45
+        polygon_colors = self._tint(colors, min(1.0, 0.4 + treble * 0.6))
+        # Semi-transparent look of the fills
+        fill_colors = self._tint(polygon_colors, 0.3)
+        
+        # Create polygon vertices for every segment at once: hexagons, then
+        # squares slightly larger. Segments are 45 degrees apart and vertices
+        # 60 or 90, so all vertices lie on a 15-degree grid
+        segment = np.arange(inner_segments)[:, None] * 3
+        hexagon_idx = segment + np.arange(6) * 4
+        square_idx = (segment + np.arange(4) * 6) % 24
+        cos_a, sin_a = self._unit_circle(24, rotation * -0.5)
+        shape_radius = inner_radius * (0.8 + np.arange(2) * 0.3)
+        hexagons = self._polar_points(cos_a[hexagon_idx % 24], sin_a[hexagon_idx % 24],
+                                      shape_radius[0]).astype(np.int32)
+        squares = self._polar_points(cos_a[square_idx], sin_a[square_idx],
+                                     shape_radius[1]).astype(np.int32)
         
         for i in range(inner_segments):
-            angle = (360 / inner_segments) * i + rotation * -0.5
-            angle_rad = math.radians(angle)
-            
             # Create multiple geometric shapes per segment
-            for shape_type in range(2):
-                shape_radius = inner_radius * (0.8 + shape_type * 0.3)
-                
-                # Create polygon vertices
-                polygon_sides = 6 if shape_type == 0 else 4  # Hexagons and squares
-                polygon_points = []
-                
-                for vertex in range(polygon_sides):
-                    vertex_angle = angle + (360 / polygon_sides) * vertex
-                    vertex_rad = math.radians(vertex_angle)
-                    vertex_x = int(center_x + math.cos(vertex_rad) * shape_radius)
-                    vertex_y = int(center_y + math.sin(vertex_rad) * shape_radius)
-                    polygon_points.append([vertex_x, vertex_y])
-                
+            for polygon_points in (hexagons[i], squares[i]):
                 # Color and draw polygon
-                color = colors[i % len(colors)]
-                brightness = min(1.0, 0.4 + treble * 0.6)
-                color = tuple(int(c * brightness) for c in color)
-                
-                polygon_points = np.array(polygon_points, dtype=np.int32)
-                cv2.polylines(img, [polygon_points], True, color, 2)
+                cv2.polylines(img, [polygon_points], True, polygon_colors[i % len(colors)], 2)
                 
                 # Fill with semi-transparent color
-                fill_color = tuple(int(c * 0.3) for c in color)
-                cv2.fillPoly(img, [polygon_points], fill_color)
+                cv2.fillPoly(img, [polygon_points], fill_colors[i % len(colors)])
         
         # Layer 4: Sacred geometry center - Flower of Life inspired
         center_radius = base_radius * 0.25
+        circle_colors = self._tint(colors, min(1.0, 0.5 + amplitude * 0.5))
         
-        # Create overlapping circles (Flower of Life pattern)
+        # Create overlapping circles (Flower of Life pattern): center + 6
+        # around it in each of the two outer rings
+        ring_radius = center_radius * (0.4 + np.arange(3) * 0.2)
+        ring_centers = self._polar_points(*self._unit_circle(6, rotation * 0.2),
+                                          ring_radius[1:, None] * 0.6).tolist()
         for circle_ring in range(3):
-            ring_radius = center_radius * (0.4 + circle_ring * 0.2)
-            circles_in_ring = 6 if circle_ring > 0 else 1  # Center + 6 around
+            circle_centers = [self.center] if circle_ring == 0 else ring_centers[circle_ring - 1]
             
-            for circle_idx in range(circles_in_ring):
-                if circle_ring == 0:  # Center circle
-                    circle_x, circle_y = center_x, center_y
-                else:
-                    circle_angle = (360 / circles_in_ring) * circle_idx + rotation * 0.2
-                    circle_rad = math.radians(circle_angle)
-                    offset_radius = ring_radius * 0.6
-                    circle_x = int(center_x + math.cos(circle_rad) * offset_radius)
-                    circle_y = int(center_y + math.sin(circle_rad) * offset_radius)
-                
-                # Color based on ring and audio
-                color = colors[circle_ring % len(colors)]
-                brightness = min(1.0, 0.5 + amplitude * 0.5)
-                color = tuple(int(c * brightness) for c in color)
-                
+            # Color based on ring and audio
+            color = circle_colors[circle_ring % len(colors)]
+            for circle_x, circle_y in circle_centers:
                 # Draw circle outline
-                cv2.circle(img, (circle_x, circle_y), int(ring_radius * 0.4), color, 2)
+                cv2.circle(img, (circle_x, circle_y), int(ring_radius[circle_ring] * 0.4), color, 2)
         
         # Layer 5: Geometric connecting lines - Sacred geometry intersections
         connection_radius = base_radius * 0.6
         num_connections = 12
+        line_colors = self._tint(colors, 0.3 + (bass * 0.3))
+        
+        connection_points = self._polar_points(*self._unit_circle(num_connections, rotation),
+                                               connection_radius).tolist()
         
         for i in range(num_connections):
             # Create geometric star patterns
             for multiplier in [2, 3, 5]:  # Different geometric ratios
-                angle1 = (360 / num_connections) * i + rotation
-                angle2 = (360 / num_connections) * ((i * multiplier) % num_connections) + rotation
-                
-                angle1_rad = math.radians(angle1)
-                angle2_rad = math.radians(angle2)
-                
-                x1 = int(center_x + math.cos(angle1_rad) * connection_radius)
-                y1 = int(center_y + math.sin(angle1_rad) * connection_radius)
-                x2 = int(center_x + math.cos(angle2_rad) * connection_radius)
-                y2 = int(center_y + math.sin(angle2_rad) * connection_radius)
+                start = tuple(connection_points[i])
+                end = tuple(connection_points[(i * multiplier) % num_connections])
                 
                 # Color based on connection type
-                color = colors[multiplier % len(colors)]
-                alpha_brightness = 0.3 + (bass * 0.3)
-                color = tuple(int(c * alpha_brightness) for c in color)
-                
-                cv2.line(img, (x1, y1), (x2, y2), color, 1)
+                cv2.line(img, start, end, line_colors[multiplier % len(colors)], 1)
         
         # Final center point - The sacred center
         center_size = max(3, int(5 + amplitude * 8))
@@ -271,7 +495,8 @@ class VisualizationGenerator:
     
     def generate_mandala_frame(self, features: Dict, time_progress: float) -> np.ndarray:
         """Generate true radial symmetry pattern with organic curved petals like preview.webp"""
-        img = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        img = self._scratch_img
+        img.fill(0)
         
         # Extract and scale features
         bass = min(features['bass'] * 500, 1.0)
@@ -288,6 +513,16 @@ class VisualizationGenerator:
         rotation = (time_progress * 5 + mid * 3) % 360  # Slower rotation
         base_radius = 80 + amplitude * 100  # Base size
         
+        # Petal outline profile (see __init__); only the breathing term changes
+        t = self._petal_t
+        breathing = np.cos(t * np.pi * 2 + time_progress * 0.1) * 0.1  # Breathing effect
+        
+        # Color for each layer, with a brighter outline for definition
+        symmetry_orders = np.arange(1, 5)
+        layer_colors = self._tint(np.asarray(colors)[(symmetry_orders - 1) % len(colors)],
+                                  np.minimum(1.0, 0.3 + amplitude * 0.5 + symmetry_orders * 0.1)[:, None])
+        outline_colors = np.minimum(255, (np.asarray(layer_colors) * 1.2).astype(int)).tolist()
+        
         # Create the characteristic curved organic petal pattern like preview.webp
         for symmetry_order in range(4, 0, -1):  # Create 4 layers, largest first
             layer_scale = 0.3 + symmetry_order * 0.2  # 0.5, 0.7, 0.9, 1.1
@@ -297,91 +532,79 @@ class VisualizationGenerator:
             # Number of petals for this layer (higher order = more petals)
             petals_in_layer = num_main_petals * symmetry_order // 2
             
-            # Color for this layer
-            layer_color = colors[(symmetry_order - 1) % len(colors)]
-            brightness = min(1.0, 0.3 + amplitude * 0.5 + symmetry_order * 0.1)
-            layer_color = tuple(int(c * brightness) for c in layer_color)
+            layer_color = layer_colors[symmetry_order - 1]
+            outline_color = outline_colors[symmetry_order - 1]
+            
+            # Outlines of every petal in the layer at once: (petals, points, xy)
+            petal_angles = self._angle_grid(petals_in_layer) + layer_rotation
+            # Use mel bands to create variation in petal shapes
+            mel_influence = np.resize(np.asarray(mel_bands, dtype=np.float64), petals_in_layer)
+            
+            # Organic radius function - creates the flowing curved shape
+            organic_modifier = (
+                np.sin(t * np.pi * 3 + petal_angles[:, None] * 0.01) * 0.15 +  # High freq ripples
+                breathing +
+                mel_influence[:, None] * 0.3  # Audio reactivity
+            )
+            point_radius = layer_radius * self._petal_radius_profile * (self._petal_curve + organic_modifier)
+            
+            # Petal directions turned by the cached side offsets (angle addition)
+            cos_petal, sin_petal = self._unit_circle(petals_in_layer, layer_rotation)
+            cos_petal, sin_petal = cos_petal[:, None, None], sin_petal[:, None, None]
+            cos_side = cos_petal * self._petal_side_cos - sin_petal * self._petal_side_sin
+            sin_side = sin_petal * self._petal_side_cos + cos_petal * self._petal_side_sin
+            outlines = np.empty((petals_in_layer, len(t), 2, 2), dtype=np.int32)
+            outlines[..., 0] = center_x + cos_side * point_radius[..., None]
+            outlines[..., 1] = center_y + sin_side * point_radius[..., None]
+            outlines = outlines.reshape(petals_in_layer, -1, 2)
             
             # Create the organic flowing petals
-            for petal in range(petals_in_layer):
-                petal_angle = (360 / petals_in_layer) * petal + layer_rotation
-                
-                # Use mel bands to create variation in petal shapes
-                mel_idx = petal % len(mel_bands)
-                mel_influence = mel_bands[mel_idx]
+            for petal_points in outlines:
+                # Fill the organic petal
+                cv2.fillPoly(img, [petal_points], layer_color)
                 
-                # Create organic flowing petal shape with multiple curves
-                petal_points = []
-                
-                # Generate smooth organic petal outline
-                for curve_step in range(36):  # 36 points for very smooth curves
-                    t = curve_step / 35.0  # Parameter from 0 to 1 along petal
-                    
-                    # Organic radius function - creates the flowing curved shape
-                    base_curve = math.sin(t * math.pi)  # Basic petal shape
-                    organic_modifier = (
-                        math.sin(t * math.pi * 3 + petal_angle * 0.01) * 0.15 +  # High freq ripples
-                        math.cos(t * math.pi * 2 + time_progress * 0.1) * 0.1 +   # Breathing effect
-                        mel_influence * 0.3  # Audio reactivity
-                    )
-                    
-                    # Radius varies organically along the petal
-                    point_radius = layer_radius * (0.2 + 0.8 * t) * (base_curve + organic_modifier)
-                    
-                    # Angular width of petal - wider at base, narrower at tip
-                    petal_width = math.sin(t * math.pi) * 0.8  # Width function
-                    
-                    # Create the flowing organic outline
-                    for side in [-1, 1]:  # Left and right sides of petal
-                        side_angle = math.radians(petal_angle + side * petal_width * 15)  # 15 degrees max width
-                        side_x = int(center_x + math.cos(side_angle) * point_radius)
-                        side_y = int(center_y + math.sin(side_angle) * point_radius)
-                        
-                        # Only add every other point to avoid overcrowding
-                        if curve_step % 2 == side % 2:
-                            petal_points.append([side_x, side_y])
-                
-                # Create filled organic petal shape
-                if len(petal_points) >= 3:
-                    petal_points = np.array(petal_points, dtype=np.int32)
-                    
-                    # Fill the organic petal
-                    cv2.fillPoly(img, [petal_points], layer_color)
-                    
-                    # Add subtle outline for definition
-                    outline_color = tuple(min(255, int(c * 1.2)) for c in layer_color)
-                    cv2.polylines(img, [petal_points], True, outline_color, 1)
+                # Add subtle outline for definition
+                cv2.polylines(img, [petal_points], True, outline_color, 1)
         
         # Add the characteristic gradient/flowing effect like in preview.webp
-        overlay = img.copy()
-        
-        # Create flowing radial gradient effect
-        for radius_step in range(20, int(base_radius * 1.2), 8):
-            for angle_step in range(0, 360, 3):
-                angle_rad = math.radians(angle_step + rotation * 0.1)
-                
-                # Create flowing effect with audio reactivity
-                flow_influence = (
-                    math.sin(angle_step * 0.05 + time_progress * 0.2) * 0.3 +
-                    math.cos(radius_step * 0.03 + time_progress * 0.15) * 0.2
-                )
-                
-                effective_radius = radius_step * (1 + flow_influence * amplitude)
-                
-                x = int(center_x + math.cos(angle_rad) * effective_radius)
-                y = int(center_y + math.sin(angle_rad) * effective_radius)
-                
-                # Check if we're inside the pattern
-                if 0 <= x < self.width and 0 <= y < self.height:
-                    if np.any(img[y, x] > 0):  # If there's already color here
-                        # Add flowing gradient effect
-                        gradient_intensity = 1.0 - (radius_step / (base_radius * 1.2))
-                        for color_channel in range(3):
-                            enhancement = int(gradient_intensity * 30 * amplitude)
-                            overlay[y, x, color_channel] = min(255, overlay[y, x, color_channel] + enhancement)
+        overlay = self._scratch_overlay
+        np.copyto(overlay, img)
+        
+        # Create flowing radial gradient effect, sampled on a polar grid of
+        # radius steps (rows) and angle steps (columns) computed in one go
+        radius_step = np.arange(20, int(base_radius * 1.2), 8)[:, None]
+        angle_step = np.arange(0, 360, 3)[None, :]
+        cos_a, sin_a = self._unit_circle(120, rotation * 0.1)  # 3-degree steps
+        
+        # Create flowing effect with audio reactivity
+        flow_influence = (
+            np.sin(angle_step * 0.05 + time_progress * 0.2) * 0.3 +
+            np.cos(radius_step * 0.03 + time_progress * 0.15) * 0.2
+        )
+        
+        effective_radius = radius_step * (1 + flow_influence * amplitude)
+        
+        xs = (center_x + cos_a * effective_radius).astype(int).ravel()
+        ys = (center_y + sin_a * effective_radius).astype(int).ravel()
+        gradient_intensity = 1.0 - (radius_step / (base_radius * 1.2))
+        enhancements = np.broadcast_to(gradient_intensity * 30 * amplitude, flow_influence.shape)
+        enhancements = enhancements.astype(int).ravel()
+        
+        # Check if we're inside the pattern and there's already color here
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        colored = np.zeros_like(inside)
+        colored[inside] = img[ys[inside], xs[inside]].any(axis=1)
+        
+        # Add flowing gradient effect. Samples can land on the same pixel, so
+        # their enhancements are summed per pixel, then added saturating at 255
+        pixels, sample_pixel = np.unique(ys[colored] * self.width + xs[colored], return_inverse=True)
+        pixel_enhancement = np.bincount(sample_pixel, weights=enhancements[colored]).astype(int)
+        pixel_y, pixel_x = np.divmod(pixels, self.width)
+        overlay[pixel_y, pixel_x] = np.minimum(
+            overlay[pixel_y, pixel_x] + pixel_enhancement[:, None], 255)
         
         # Blend the gradient overlay
-        img = cv2.addWeighted(img, 0.7, overlay, 0.3, 0)
+        cv2.addWeighted(img, 0.7, overlay, 0.3, 0, dst=img)
         
         # Add the characteristic center pattern
         center_radius = int(15 + amplitude * 25)
@@ -390,9 +613,7 @@ class VisualizationGenerator:
         for center_ring in range(5):
             ring_radius = center_radius - center_ring * 3
             if ring_radius > 0:
-                ring_color = colors[center_ring % len(colors)]
-                ring_brightness = 1.0 - center_ring * 0.15
-                ring_color = tuple(int(c * ring_brightness) for c in ring_color)
+                ring_color = self._center_ring_colors[center_ring]
                 
                 # Alternate between filled and outline rings
                 if center_ring % 2 == 0:
@@ -410,7 +631,8 @@ class VisualizationGenerator:
     
     def generate_kaleidoscope_frame(self, features: Dict, time_progress: float) -> np.ndarray:
         """Generate true kaleidoscope visualization with organic flowing patterns"""
-        img = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        img = self._scratch_img
+        img.fill(0)
         
         bass = features['bass'] * 100
         mid = features['mid'] * 100
@@ -420,104 +642,100 @@ class VisualizationGenerator:
         
         colors = self.color_palettes['plasma']
         
-        # Kaleidoscope with flowing organic segments
+        # Kaleidoscope with flowing organic segments over multiple depth layers.
+        # The geometry is compiled (see _kaleidoscope_geometry); only the draw
+        # calls are made from Python
         num_segments = 64  # More segments for smoother kaleidoscope
-        base_radius = 80
-        
-        for i in range(num_segments):
-            segment_angle = (360 / num_segments) * i
+        depths = 6
+        geometry = _kaleidoscope_geometry(num_segments, depths, 80.0, float(bass), float(mid),
+                                          float(amplitude), np.asarray(mel_bands, dtype=np.float64),
+                                          float(time_progress), self.center[0], self.center[1],
+                                          len(colors))
+        
+        # Dynamic brightness based on audio, one color table per depth
+        depth = np.arange(depths)
+        brightness = np.minimum(1.0, 0.2 + mid * 0.01 + treble * 0.008 + depth * 0.1)
+        layer_colors = self._tint(colors, brightness[:, None, None])
+        thicknesses = [max(1, int(1 + treble * 0.05 + d * 0.5)) for d in range(depths)]
+        particle_sizes = [max(1, int(1 + amplitude * 0.1 + d * 0.3)) for d in range(depths)]
+        
+        # Draw in segment-then-depth order so overlapping strokes stack the
+        # same way every frame
+        for k, (x, y, next_x, next_y, color_idx) in enumerate(geometry.tolist()):
+            d = k % depths
+            color = layer_colors[d][color_idx]
             
-            # Create organic flowing radius using multiple wave functions
-            wave1 = math.sin(time_progress * 2 + i * 0.1)
-            wave2 = math.cos(time_progress * 1.5 + i * 0.15)
-            wave3 = math.sin(time_progress * 3 + i * 0.05)
+            # Draw flowing curves
+            cv2.line(img, (x, y), (next_x, next_y), color, thicknesses[d])
             
-            # Mel band influence on radius
-            mel_idx = min(i % len(mel_bands), len(mel_bands) - 1)
-            mel_influence = mel_bands[mel_idx] * 3
+            # Add organic particles/nodes
+            if amplitude > 2:
+                cv2.circle(img, (x, y), particle_sizes[d], color, -1)
             
-            # Complex radius calculation for organic feel
-            radius_variation = base_radius * (
-                0.5 +                           # Base
-                bass * 0.008 +                  # Bass influence
-                wave1 * 0.3 +                   # Primary wave
-                wave2 * 0.2 +                   # Secondary wave  
-                wave3 * 0.1 +                   # Tertiary wave
-                mel_influence * 0.3 +           # Mel band influence
-                amplitude * 0.01                # Amplitude influence
-            )
-            
-            # Multiple depth layers for kaleidoscope effect
-            for depth in range(6):
-                depth_scale = 0.2 + depth * 0.16  # 0.2, 0.36, 0.52, 0.68, 0.84, 1.0
-                layer_radius = radius_variation * depth_scale
-                
-                # Color cycling with time and depth
-                color_phase = (time_progress * 0.3 + i * 0.02 + depth * 0.1) % 1
-                color_idx = int(color_phase * len(colors))
-                base_color = colors[color_idx % len(colors)]
-                
-                # Dynamic brightness based on audio
-                brightness = min(1.0, 0.2 + mid * 0.01 + treble * 0.008 + depth * 0.1)
-                color = tuple(int(c * brightness) for c in base_color)
-                
-                # Calculate flowing positions with multiple wave offsets
-                wave_offset_x = (math.sin(time_progress * 1.8 + i * 0.25 + depth * 0.1) * 
-                               (5 + bass * 0.1))
-                wave_offset_y = (math.cos(time_progress * 2.2 + i * 0.3 + depth * 0.15) * 
-                               (5 + mid * 0.1))
-                
-                angle_rad = math.radians(segment_angle + time_progress * 10)
-                x = int(self.center[0] + math.cos(angle_rad) * layer_radius + wave_offset_x)
-                y = int(self.center[1] + math.sin(angle_rad) * layer_radius + wave_offset_y)
-                
-                # Create flowing connections
-                next_segment = (i + 1) % num_segments
-                next_angle_rad = math.radians((360 / num_segments) * next_segment + time_progress * 10)
-                next_x = int(self.center[0] + math.cos(next_angle_rad) * layer_radius + wave_offset_x)
-                next_y = int(self.center[1] + math.sin(next_angle_rad) * layer_radius + wave_offset_y)
-                
-                # Draw flowing curves
-                thickness = max(1, int(1 + treble * 0.05 + depth * 0.5))
-                cv2.line(img, (x, y), (next_x, next_y), color, thickness)
-                
-                # Add organic particles/nodes
-                particle_size = max(1, int(1 + amplitude * 0.1 + depth * 0.3))  # Always define particle_size
-                if amplitude > 2:
-                    cv2.circle(img, (x, y), particle_size, color, -1)
-                
-                # Create symmetric kaleidoscope effect by mirroring
-                if depth % 2 == 0:  # Mirror every other layer
-                    mirror_x = self.width - x
-                    mirror_y = self.height - y
-                    if 0 <= mirror_x < self.width and 0 <= mirror_y < self.height:
-                        cv2.circle(img, (mirror_x, mirror_y), particle_size, color, -1)
+            # Create symmetric kaleidoscope effect by mirroring
+            if d % 2 == 0:  # Mirror every other layer
+                mirror_x = self.width - x
+                mirror_y = self.height - y
+                if 0 <= mirror_x < self.width and 0 <= mirror_y < self.height:
+                    cv2.circle(img, (mirror_x, mirror_y), particle_sizes[d], color, -1)
         
         # Apply slight blur for organic flow effect
         img = cv2.GaussianBlur(img, (3, 3), 0.5)
         
         return img
     
-    def create_visualization_video(self, audio_file: str, output_file: str = "visualization.mp4",
-                                 duration: float = 10.0, fps: int = 24, style: str = "mixed") -> Optional[str]:
-        """
-        Create MP4 visualization directly from audio file using Essentia
-        """
-        print(f"Loading audio from {audio_file}")
-        
-        try:
-            # Load audio using Essentia (consistent with your existing code)
-            # Configure the loader with the filename, then call it
-            loader = es.MonoLoader(filename=audio_file, sampleRate=44100)
-            audio = loader()
-        except Exception as e:
-            print(f"Error loading audio: {e}")
-            return None
-        
-        print(f"Audio loaded: {len(audio)/44100:.2f}s duration")
+    @staticmethod
+    def _frame_methods(all_features: List[Dict], style: str) -> List[str]:
+        """Name of the frame generator method to use for each frame"""
+        if style == "mandala":
+            return ['generate_mandala_frame'] * len(all_features)
+        if style == "sacred_geometry":
+            return ['generate_sacred_geometry_frame'] * len(all_features)
+        if style != "mixed":  # kaleidoscope
+            return ['generate_kaleidoscope_frame'] * len(all_features)
+        
+        # Mixed: switch based on audio characteristics, decided for all frames
+        # at once
+        bass = np.array([features['bass'] for features in all_features])
+        mid = np.array([features['mid'] for features in all_features])
+        treble = np.array([features['treble'] for features in all_features])
+        bass_heavy = bass > treble             # Mandala for bass-heavy sections
+        mid_heavy = ~bass_heavy & (mid > bass)  # Sacred geometry for mid-heavy sections
+        treble_heavy = ~bass_heavy & ~mid_heavy  # Kaleidoscope for treble-heavy sections
+        
+        # Once a mid-heavy frame has picked sacred geometry, it stays selected.
+        # Otherwise the mandala is kept from the last bass- or treble-heavy
+        # frame; mid-heavy frames do not change it
+        use_sacred = np.logical_or.accumulate(mid_heavy)
+        frame_idx = np.arange(len(all_features))
+        last_switch = np.maximum.accumulate(np.where(bass_heavy | treble_heavy, frame_idx, -1))
+        use_mandala = (last_switch >= 0) & bass_heavy[np.maximum(last_switch, 0)]
+        
+        methods = np.select([use_sacred, use_mandala],
+                            ['generate_sacred_geometry_frame', 'generate_mandala_frame'],
+                            'generate_kaleidoscope_frame')
+        return methods.tolist()
+    
+    def _open_video_writer(self, output_file: str, fps: int):
+        """Open a writer for the video, returning (writer, actual output file).
         
-        # Setup video writer with fallback codecs
+        Frames are piped to ffmpeg when it is installed; otherwise OpenCV's
+        writer is tried with a list of fallback codecs. The writer is None if
+        nothing could be opened.
+        """
+        size = (self.width, self.height)
+        ffmpeg = _ffmpeg_encoder()
+        if ffmpeg is not None:
+            actual_output_file = output_file
+            if not output_file.lower().endswith('.mp4'):
+                actual_output_file = f"{os.path.splitext(output_file)[0]}.mp4"
+            print(f"Using ffmpeg encoder: {ffmpeg[1]}, output: {actual_output_file}")
+            return FFmpegWriter(*ffmpeg, actual_output_file, fps, size), actual_output_file
+        
+        # Setup video writer with fallback codecs. H.264 comes first: it is the
+        # codec hardware encoders provide
         fourcc_options = [
+            ('avc1', 'mp4'),
             ('mp4v', 'mp4'),
             ('XVID', 'avi'), 
             ('MJPG', 'avi'),
@@ -535,7 +753,11 @@ class VisualizationGenerator:
                     actual_output_file = f"{base_name}.{extension}"
                 
                 fourcc = cv2.VideoWriter_fourcc(*fourcc_code)
-                video_writer = cv2.VideoWriter(actual_output_file, fourcc, fps, (self.width, self.height))
+                if _WRITER_PARAMS:
+                    video_writer = cv2.VideoWriter(actual_output_file, cv2.CAP_ANY, fourcc, fps,
+                                                   size, _WRITER_PARAMS)
+                else:
+                    video_writer = cv2.VideoWriter(actual_output_file, fourcc, fps, size)
                 
                 if video_writer.isOpened():
                     print(f"Using codec: {fourcc_code}, output: {actual_output_file}")
@@ -550,60 +772,115 @@ class VisualizationGenerator:
                     video_writer = None
         
         if not video_writer or not video_writer.isOpened():
-            print("Error: Could not open video writer with any codec")
+            return None, actual_output_file
+        return video_writer, actual_output_file
+    
+    def create_visualization_video(self, audio_file: str, output_file: str = "visualization.mp4",
+                                 duration: float = 10.0, fps: int = 24, style: str = "mixed",
+                                 progress: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Create MP4 visualization directly from audio file using Essentia
+        
+        progress, if given, is called with short status messages as the work advances
+        """
+        print(f"Loading audio from {audio_file}")
+        
+        try:
+            # Load audio using Essentia (consistent with your existing code)
+            # Configure the loader with the filename, then call it
+            loader = es.MonoLoader(filename=audio_file, sampleRate=44100)
+            audio = loader()
+        except Exception as e:
+            print(f"Error loading audio: {e}")
             return None
         
+        print(f"Audio loaded: {len(audio)/44100:.2f}s duration")
+        
         # Calculate frame parameters
         total_frames = int(duration * fps)
         frame_size = 2048
-        hop_size = int(44100 / fps)  # Samples per video frame
+        
+        # Extract the features of all frames up front, in one batch
+        frame_starts = [int((frame_idx / total_frames) * duration * 44100)
+                        for frame_idx in range(total_frames)]
+        all_features = self.extract_features(audio, frame_starts, frame_size)
+        if progress:
+            progress(f"Extracted audio features for {total_frames} frames, rendering...")
         
         print(f"Generating {total_frames} frames at {fps} FPS")
         
-        for frame_idx in range(total_frames):
-            # Calculate audio position
-            time_progress = (frame_idx / total_frames) * duration
-            audio_sample_idx = int(time_progress * 44100)
-            
-            # Extract features using Essentia
-            features = self.extract_frame_features(audio, audio_sample_idx, frame_size)
-            
-            # Choose visualization style
-            if style == "mixed":
-                # Switch based on audio characteristics
-                if features['bass'] > features['treble']:
-                    use_mandala = True  # Mandala for bass-heavy sections
-                elif features['mid'] > features['bass']:
-                    use_sacred = True   # Sacred geometry for mid-heavy sections
-                else:
-                    use_mandala = False  # Kaleidoscope for treble-heavy sections
-            elif style == "mandala":
-                use_mandala = True
-                use_sacred = False
-            elif style == "sacred_geometry":
-                use_mandala = False
-                use_sacred = True
-            else:  # kaleidoscope
-                use_mandala = False
-                use_sacred = False
-            
-            # Generate frame
-            if style == "sacred_geometry" or (style == "mixed" and 'use_sacred' in locals() and use_sacred):
-                frame = self.generate_sacred_geometry_frame(features, time_progress * 10)
-            elif use_mandala:
-                frame = self.generate_mandala_frame(features, time_progress * 10)
+        # Frames are independent: render them on all cores, writing them in
+        # order as they come back
+        frame_methods = self._frame_methods(all_features, style)
+        jobs = [(frame_methods[frame_idx], all_features[frame_idx], (frame_idx / total_frames) * duration * 10)
+                for frame_idx in range(total_frames)]
+        n_workers = min(os.cpu_count() or 1, total_frames)
+        executor = None
+        
+        video_writer, actual_output_file = self._open_video_writer(output_file, fps)
+        if video_writer is None:
+            print("Error: Could not open video writer with any codec")
+            return None
+        
+        # Encoding overlaps rendering: each frame is written on a writer thread
+        # while the next one renders. Waiting for the previous write before
+        # queueing the next keeps the frames in order and bounds memory
+        writer = ThreadPoolExecutor(max_workers=1)
+        pending_write = None
+        completed = False
+        try:
+            if n_workers > 1:
+                executor = ProcessPoolExecutor(max_workers=n_workers,
+                                               mp_context=_render_process_context(),
+                                               initializer=_init_render_worker,
+                                               initargs=(self.width, self.height))
+                frames = executor.map(_render_in_worker, jobs, chunksize=8)
             else:
-                frame = self.generate_kaleidoscope_frame(features, time_progress * 10)
+                frames = (getattr(self, method)(features, time_progress)
+                          for method, features, time_progress in jobs)
             
-            # Write frame to video
-            video_writer.write(frame)
-            
-            # Progress update
-            if (frame_idx + 1) % 30 == 0:
-                progress = (frame_idx + 1) / total_frames * 100
-                print(f"Progress: {progress:.1f}% ({frame_idx + 1}/{total_frames})")
+            for frame_idx, frame in enumerate(frames):
+                # Write frame to video
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = writer.submit(video_writer.write, frame)
+                
+                # Progress update
+                if (frame_idx + 1) % 30 == 0:
+                    percent = (frame_idx + 1) / total_frames * 100
+                    print(f"Progress: {percent:.1f}% ({frame_idx + 1}/{total_frames})")
+                    if progress:
+                        progress(f"Rendering frames: {percent:.0f}% ({frame_idx + 1}/{total_frames})")
+            if pending_write is not None:
+                pending_write.result()
+            completed = True
+        finally:
+            writer.shutdown()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            # Released however rendering ends; an unfinished video is deleted
+            _close_video_writer(video_writer, actual_output_file, abort=not completed)
         
-        video_writer.release()
         print(f"Visualization saved as {actual_output_file}")
         
         return actual_output_file
+
+
+def _render_process_context():
+    """Start method for the render workers. This runs on a Qt thread-pool
+    thread, and forking a multi-threaded Qt process can deadlock the child, so
+    workers come from a fork server (or are spawned where there is none)"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+# Generator of each frame rendering worker process, built once by its initializer
+_render_generator = None
+
+def _init_render_worker(width, height):
+    global _render_generator
+    _render_generator = VisualizationGenerator(width, height)
+
+def _render_in_worker(job):
+    method, features, time_progress = job
+    return getattr(_render_generator, method)(features, time_progress)
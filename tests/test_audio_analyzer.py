@@ -0,0 +1,51 @@
+import numpy as np
+import soundfile as sf
+
+from analyzer.audio_analyzer import AudioAnalyzer
+
+SAMPLE_RATE = 44100
+
+
+def _click_track(path, bpm, seconds=12.0):
+    """Write a click track at a constant tempo, accenting every fourth beat"""
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    t = np.arange(int(0.05 * SAMPLE_RATE)) / SAMPLE_RATE
+    click = (np.sin(2 * np.pi * 1000 * t) * np.exp(-60 * t)).astype(np.float32)
+    beat_period = 60.0 / bpm
+    for beat, start in enumerate(np.arange(0.1, seconds - 0.1, beat_period)):
+        i = int(start * SAMPLE_RATE)
+        audio[i:i + len(click)] += click * (1.0 if beat % 4 == 0 else 0.6)
+    sf.write(str(path), audio, SAMPLE_RATE)
+    return str(path)
+
+
+def test_tempo_is_estimated_per_file(tmp_path):
+    # One analyzer reuses its cached algorithms for every file, as the GUI and
+    # each batch worker do
+    analyzer = AudioAnalyzer()
+    slow = _click_track(tmp_path / "slow.wav", 97)
+    fast = _click_track(tmp_path / "fast.wav", 140)
+
+    slow_bpm = analyzer.analyze_audio(slow)['bpm']
+    fast_bpm = analyzer.analyze_audio(fast)['bpm']
+
+    assert slow_bpm != fast_bpm
+    assert abs(slow_bpm - 97) < 2
+    assert abs(fast_bpm - 140) < 2
+
+
+def test_batch_worker_estimates_tempo_per_file(tmp_path):
+    files = [_click_track(tmp_path / "slow.wav", 97), _click_track(tmp_path / "fast.wav", 140)]
+
+    # A single worker analyzes both files with the same AudioAnalyzer
+    items = AudioAnalyzer().batch_analyze(files, max_workers=1)
+
+    slow_bpm, fast_bpm = (item.results['bpm'] for item in items)
+    assert slow_bpm != fast_bpm
+    assert abs(slow_bpm - 97) < 2
+    assert abs(fast_bpm - 140) < 2
+
+
+def test_slow_tempo_is_not_doubled(tmp_path):
+    bpm = AudioAnalyzer().analyze_audio(_click_track(tmp_path / "slow.wav", 75))['bpm']
+    assert abs(bpm - 75) < 2